@@ -2,18 +2,58 @@
 
 # Distribution modules
 import argparse, pickle, json
-from   datetime import datetime
+from   collections        import deque
+from   heapq              import heappush, heapreplace
+from   concurrent.futures import ProcessPoolExecutor
+from   datetime           import datetime
+from   multiprocessing    import get_context
 
 # Community modules
-import matplotlib.pyplot as plt
-from   networkx import DiGraph, is_directed_acyclic_graph, draw_networkx
-from   networkx import arf_layout, kamada_kawai_layout, circular_layout
-from   networkx import shell_layout, spring_layout, spectral_layout
+# matplotlib and networkx drawing are imported only to plot the network
+from   networkx import DiGraph
 from   networkx import node_link_data, topological_sort
-from   pandas   import DataFrame, read_csv, read_feather, read_pickle
+from   numpy    import arange, argpartition, argsort, array, concatenate
+from   numpy    import cumsum, errstate, inf, isfinite, lexsort, load, repeat
+from   numpy    import searchsorted, split, take_along_axis, where
+from   pandas   import DataFrame, Index, factorize, read_csv, read_feather
+from   pandas   import read_parquet, read_pickle
 
 # Local modules
 from gmn.Auxiliary import ReadDataFrame
+from gmn.Network   import WriteNetwork
+
+# Worker globals set in InitNetworkWorker()
+workerRankings = None # { ( threshold, cmi ) : RankDrivers() }
+workerColumns  = None # interaction matrix columns
+workerPosition = None # { node : interaction matrix row }
+
+# Column names of a sparse edge list interaction matrix file
+edgeListColumns = [ 'source', 'target', 'weight' ]
+
+#----------------------------------------------------------------------------
+class EdgeMatrix :
+    '''Sparse interaction matrix : value of driver col on driven node row,
+       row, col are int index arrays into labels. Cells not in row, col
+       are nan. index and columns are labels as in an NxN DataFrame.'''
+
+    def __init__( self, labels, row, col, value ) :
+        self.index   = Index( labels )
+        self.columns = self.index
+        self.row     = row
+        self.col     = col
+        self.value   = value
+        self.shape   = ( len( labels ), len( labels ) )
+
+    def drop( self, labels ) :
+        '''New EdgeMatrix without labels and their edges'''
+        keep     = ~self.index.isin( labels )
+        newIndex = cumsum( keep ) - 1
+        edges    = keep[ self.row ] & keep[ self.col ]
+
+        return EdgeMatrix( self.index[ keep ],
+                           newIndex[ self.row[ edges ] ],
+                           newIndex[ self.col[ edges ] ],
+                           self.value[ edges ] )
 
 #----------------------------------------------------------------------------
 def CreateNetwork( interactionMatrix = None, interactionMatrixFile = None,
@@ -26,8 +66,9 @@ def CreateNetwork( interactionMatrix = None, interactionMatrixFile = None,
                    verbose = False, debug = False ):
 
     '''Create a GMN network using networkx directed graph DiGraph.
-    An interaction matrix (interactionMatrix DataFrame or file name) is
-    required input. targetCols is required input.
+    An interaction matrix (interactionMatrix DataFrame, EdgeMatrix or file
+    name) is required input. targetCols is required input.
+    Interaction matrix files : see GetInteractionMatrix().
 
     The imatrix rows quantify interaction for each node. The node in the
     first column of a row is the driven node, nodes in the other columns
@@ -43,7 +84,8 @@ def CreateNetwork( interactionMatrix = None, interactionMatrixFile = None,
     but replaced with any node mappings specified in numDriversDF.
 
     Output: Write binary networkx.DiGraph() object to args.outputFile,
-    or a .json file if args.outputFile ends with ".json"
+    or a .json file if args.outputFile ends with ".json", or a compact
+    .npz file (gmn.Network.WriteNetwork) if args.outputFile ends with ".npz"
 
     Return { Graph : network_graph, Map : network_dict }.
     '''
@@ -70,72 +112,17 @@ def CreateNetwork( interactionMatrix = None, interactionMatrixFile = None,
                                    columns        = iMatrix.columns,
                                    verbose = verbose, debug = debug )
 
+    # Ranked drivers of all nodes : iMatrix column indices
+    topDrivers = RankDrivers( iMatrix, D_numDrivers, threshold, cmi )
+    columns    = iMatrix.columns
+    position   = { node : i for i, node in enumerate( iMatrix.index ) }
+
     if verbose :
         print( f'CreateNetwork() Discover... {datetime.now()}', flush = True )
 
-    network_graph = DiGraph() # for assessing graph properties
-    network_nodes = []        # nodes already added to network
-
-    # nodes to be explored start at targetCols
-    explore_queue = targetCols.copy()  
-    network_dict  = {}  # { node : [drivers] }
-    network_cycle = {}  # nodes that create loops (not used)
-
-    # Starting at targetCols, keep adding nodes until no more
-    # nodes in explore_queue
-    while len( explore_queue ):
-        node_id = explore_queue.pop(0)
-
-        if node_id in network_nodes:
-            continue
-
-        nodeNumDrivers = D_numDrivers[ node_id ]
-
-        network_nodes.append( node_id )
-        network_dict [ node_id ] = [] # empty list of drivers for new node
-        network_cycle[ node_id ] = [] # empty list of cyclic nodes for new node
-
-        # Sort & rank iMatrix (ascending if CMI
-        # Store node_ids that exceed threshold (or meet if CMI)
-        if cmi :
-            # Rank iMatrix ascending, not descending
-            # df.loc[ x ] returns the row x as a Series.
-            top_drivers =\
-                iMatrix.loc[ node_id ].sort_values( ascending = True )
-            # Threshold iMatrix >= to allow 0 MI as best rank
-            top_drivers =\
-                top_drivers[( top_drivers >= threshold ) & \
-                            ( top_drivers.index != node_id )][:nodeNumDrivers]
-        else :
-            # df.loc[ x ] returns the row x as a Series.
-            top_drivers =\
-                iMatrix.loc[ node_id ].sort_values()
-
-            top_drivers =\
-                top_drivers[( top_drivers > threshold ) & \
-                            ( top_drivers.index != node_id )][:nodeNumDrivers]
-
-        for driver_id in top_drivers.index:
-            # Try adding driver -> current node & edge to network
-            network_graph.add_node( driver_id )
-            network_graph.add_edge( driver_id, node_id )
-
-            if is_directed_acyclic_graph( network_graph ):
-                network_dict[ node_id ].append( driver_id )
-            else:
-                # driver_id created a cycle, remove edge
-                network_graph.remove_edge( driver_id, node_id )
-
-                if not network_graph.has_node( node_id ) :
-                    # node_id not in network, remove the driver
-                    network_graph.remove_node( driver_id )
-
-                # store driver_id in network_cycle (for reporting)
-                network_cycle[ node_id ].append( driver_id )
-
-        # Add driver nodes to explore_queue for upstream nodes
-        for driver_id in network_dict[ node_id ]:
-            explore_queue.append( driver_id )
+    network_graph, network_dict, network_cycle = \
+        DiscoverNetwork( targetCols, topDrivers, D_numDrivers,
+                         columns, position )
 
     print( len( network_graph ), 'nodes', flush = True )
     if cmi :
@@ -157,23 +144,18 @@ def CreateNetwork( interactionMatrix = None, interactionMatrixFile = None,
         if verbose :
             print( f'Writing {outputFile} {datetime.now()}', flush = True )
 
-        if ".json" in outputFile[-5:] :
-            obj = node_link_data( network_graph, edges = "edges" )
-            obj[ 'topological_ordering' ] =\
-                list( topological_sort( network_graph ) )
-            obj[ 'target_cols' ] = targetCols
-
-            with open( outputFile, 'w' ) as fdOut:
-                json.dump( obj, fdOut )
-        else:
-            with open( outputFile, 'wb' ) as fdOut:
-                pickle.dump( Network, fdOut )
+        WriteNetworkFile( outputFile, Network, targetCols )
 
         if verbose :
             print( f'Writing complete {datetime.now()}', flush = True )
 
     #----------------------------------------------------------
     if plotNetwork :
+        import matplotlib.pyplot as plt
+        from   networkx import draw_networkx
+        from   networkx import arf_layout, kamada_kawai_layout, circular_layout
+        from   networkx import shell_layout, spring_layout, spectral_layout
+
         if   layout == 'arf'     : layout = arf_layout
         elif layout == 'kk'      : layout = kamada_kawai_layout
         elif layout == 'circ'    : layout = circular_layout
@@ -195,20 +177,388 @@ def CreateNetwork( interactionMatrix = None, interactionMatrixFile = None,
 
     return Network
 
+#----------------------------------------------------------------------------
+def CreateNetworks( networks, interactionMatrix = None,
+                    interactionMatrixFile = None, excludeColumns = [],
+                    cores = 1, mpMethod = None, verbose = False ):
+    '''Create many networks from one interaction matrix.
+
+    networks : list of dict of CreateNetwork() arguments targetCols,
+    threshold, numDrivers, driversFile, driversColumns, cmi, outputFile.
+    Missing keys have the CreateNetwork() defaults. Each network with an
+    outputFile is written to its own file.
+
+    The interaction matrix is read once. Drivers are ranked once for each
+    ( threshold, cmi ) to the largest numDrivers of each node over the
+    networks : the numDrivers first drivers of the ranking are the drivers
+    of a network. Networks are discovered in a pool of cores processes.
+
+    Return list of { Graph : network_graph, Map : network_dict }.
+    '''
+    start = datetime.now()
+
+    iMatrix = GetInteractionMatrix(interactionMatrix     = interactionMatrix,
+                                   interactionMatrixFile = interactionMatrixFile,
+                                   excludeColumns        = excludeColumns,
+                                   verbose               = verbose)
+
+    # Tasks : ( targetCols, ( threshold, cmi ), D_numDrivers, outputFile )
+    tasks    = []
+    rankKeys = {} # { ( threshold, cmi ) : { node : max numDrivers } }
+    for network in networks :
+        targetCols = network.get( 'targetCols', [] )
+        if isinstance( targetCols, str ) :
+            targetCols = [ targetCols ]
+        if not len( targetCols ) :
+            err = 'CreateNetworks() targetCols required'
+            raise RuntimeError( err )
+
+        D_numDrivers = GetNodeDrivers(
+            driversFile    = network.get( 'driversFile', None ),
+            driversColumns = network.get( 'driversColumns', ['column','E'] ),
+            numDrivers     = network.get( 'numDrivers', 3 ),
+            columns        = iMatrix.columns, verbose = verbose )
+
+        rankKey = ( network.get( 'threshold', 0 ), network.get( 'cmi', False ) )
+        maxDrivers = rankKeys.setdefault( rankKey, {} )
+        for node, numDrivers in D_numDrivers.items() :
+            maxDrivers[ node ] = max( maxDrivers.get( node, 0 ), numDrivers )
+
+        tasks.append( ( targetCols, rankKey, D_numDrivers,
+                        network.get( 'outputFile', None ) ) )
+
+    rankings = {}
+    for rankKey, maxDrivers in rankKeys.items() :
+        if verbose :
+            print( f'CreateNetworks() RankDrivers threshold {rankKey[0]} ' +\
+                   f'cmi {rankKey[1]} {datetime.now()}', flush = True )
+        rankings[ rankKey ] = RankDrivers( iMatrix, maxDrivers, *rankKey )
+
+    initargs = ( rankings, iMatrix.columns )
+
+    if cores > 1 and len( tasks ) > 1 :
+        with ProcessPoolExecutor( max_workers = cores,
+                                  mp_context  = get_context( mpMethod ),
+                                  initializer = InitNetworkWorker,
+                                  initargs    = initargs ) as exe :
+            Networks = list( exe.map( NetworkFunc, tasks ) )
+    else :
+        InitNetworkWorker( *initargs )
+        Networks = [ NetworkFunc( task ) for task in tasks ]
+
+    for task, Network in zip( tasks, Networks ) :
+        print( f'{task[3]} {len( Network["Graph"] )} nodes', flush = True )
+
+    print( f'{len( Networks )} networks {len( rankings )} rankings ' +\
+           f'Elapsed time: {datetime.now() - start}', flush = True )
+
+    return Networks
+
+#----------------------------------------------------------------------------
+def InitNetworkWorker( rankings, columns ) :
+    '''CreateNetworks() ProcessPoolExecutor initializer : set the shared
+       driver rankings and interaction matrix columns.'''
+
+    global workerRankings, workerColumns, workerPosition
+
+    workerRankings = rankings
+    workerColumns  = columns
+    workerPosition = { node : i for i, node in enumerate( columns ) }
+
+#----------------------------------------------------------------------------
+def NetworkFunc( task ) :
+    '''Discover and write one CreateNetworks() network.
+       task : ( targetCols, ( threshold, cmi ), D_numDrivers, outputFile )
+       Return { Graph : network_graph, Map : network_dict }'''
+
+    targetCols, rankKey, D_numDrivers, outputFile = task
+
+    network_graph, network_dict, network_cycle = \
+        DiscoverNetwork( targetCols, workerRankings[ rankKey ], D_numDrivers,
+                         workerColumns, workerPosition )
+
+    Network = { 'Graph' : network_graph, 'Map' : network_dict }
+
+    if outputFile :
+        WriteNetworkFile( outputFile, Network, targetCols )
+
+    return Network
+
+#----------------------------------------------------------------------------
+def DiscoverNetwork( targetCols, topDrivers, D_numDrivers, columns, position ):
+    '''Starting at targetCols link the first D_numDrivers[ node ] drivers
+       of topDrivers[ position[ node ] ] ( RankDrivers() ) to each node,
+       then recursively the drivers of the drivers, without cycles.
+       Return DiGraph, { node : [drivers] }, { node : [cyclic drivers] }'''
+
+    def Drivers( node ) :
+        drivers = topDrivers[ position[ node ] ]
+        return columns[ drivers[ : int( D_numDrivers.get( node,
+                                                          len( drivers ) ) ) ] ]
+
+    network = StreamNetwork( targetCols )
+    network.Discover( Drivers )
+
+    return network.graph, network.network_dict, network.network_cycle
+
+#----------------------------------------------------------------------------
+class StreamNetwork :
+    '''Network discovery of CreateNetwork() from targetCols as the drivers
+       of nodes become available : Discover( Drivers ) explores nodes in
+       breadth first order while Drivers( node ) is not None. Drivers of
+       a node are linked in their order unless an edge creates a cycle.'''
+
+    def __init__( self, targetCols ) :
+        self.graph         = DiGraph() # for assessing graph properties
+        self.order         = {}        # topological order : AddEdgeAcyclic
+        self.network_dict  = {}        # { node : [drivers] }
+        self.network_cycle = {}        # nodes that create loops (not used)
+
+        # nodes to be explored start at targetCols
+        self.explore_queue = deque( targetCols )
+
+    def Discover( self, Drivers ) :
+        '''Explore nodes while Drivers( node ) of the next node is not
+           None. Return True if the network is complete.'''
+
+        while len( self.explore_queue ):
+            node_id = self.explore_queue[0]
+
+            if node_id in self.network_dict:
+                self.explore_queue.popleft()
+                continue
+
+            drivers = Drivers( node_id )
+            if drivers is None :
+                return False # drivers of node_id not yet available
+
+            self.explore_queue.popleft()
+            self.network_dict [ node_id ] = [] # drivers for new node
+            self.network_cycle[ node_id ] = [] # cyclic nodes for new node
+
+            for driver_id in drivers :
+                # Try adding driver -> current node & edge to network
+                if AddEdgeAcyclic( self.graph, self.order,
+                                   driver_id, node_id ) :
+                    self.network_dict[ node_id ].append( driver_id )
+                else:
+                    # driver_id created a cycle, edge not added
+                    # store driver_id in network_cycle (for reporting)
+                    self.network_cycle[ node_id ].append( driver_id )
+
+            # Add driver nodes to explore_queue for upstream nodes
+            self.explore_queue.extend( self.network_dict[ node_id ] )
+
+        return True
+
+    def Network( self ) :
+        '''{ Graph : network_graph, Map : network_dict }'''
+        return { 'Graph' : self.graph, 'Map' : self.network_dict }
+
+#----------------------------------------------------------------------------
+class DriverHeaps :
+    '''Bounded top drivers of each row of an interaction matrix filled
+       cell by cell : RankDrivers() of the cells added. Each row keeps
+       the numDrivers[ row ] smallest ( value, col ) of the values >
+       threshold ( >= threshold if cmi ) in a heap.'''
+
+    def __init__( self, numDrivers, threshold = 0, cmi = False ) :
+        self.numDrivers = numDrivers
+        self.threshold  = threshold
+        self.cmi        = cmi
+        self.heaps      = [ [] for _ in numDrivers ] # ( -value, -col )
+
+    def Add( self, row, col, value ) :
+        '''Add cell row, col ( int indices ) value, None or nan ignored'''
+
+        if value is None or row == col or not \
+           ( value >= self.threshold if self.cmi else value > self.threshold ) :
+            return
+
+        heap = self.heaps[ row ]
+        if len( heap ) < self.numDrivers[ row ] :
+            heappush( heap, ( -value, -col ) )
+        elif len( heap ) and ( -value, -col ) > heap[0] :
+            heapreplace( heap, ( -value, -col ) )
+
+    def Drivers( self, row ) :
+        '''Column indices of the top drivers of row in ascending order'''
+        return [ -col for _, col in sorted( self.heaps[ row ], reverse = True ) ]
+
+#----------------------------------------------------------------------------
+def WriteNetworkFile( outputFile, Network, targetCols = [] ):
+    '''Write Network { Graph, Map } to outputFile : networkx node link
+       .json, compact .npz ( gmn.Network.WriteNetwork ), else pickle'''
+
+    if ".json" in outputFile[-5:] :
+        obj = node_link_data( Network[ 'Graph' ], edges = "edges" )
+        obj[ 'topological_ordering' ] =\
+            list( topological_sort( Network[ 'Graph' ] ) )
+        obj[ 'target_cols' ] = targetCols
+
+        with open( outputFile, 'w' ) as fdOut:
+            json.dump( obj, fdOut )
+    elif ".npz" in outputFile[-4:] :
+        WriteNetwork( outputFile, Network[ 'Graph' ] )
+    else:
+        with open( outputFile, 'wb' ) as fdOut:
+            pickle.dump( Network, fdOut )
+
+    return Network
+
+#----------------------------------------------------------------------------
+def AddEdgeAcyclic( graph, order, u, v ) :
+    '''Add nodes u, v and edge u -> v to DiGraph graph if the edge does
+       not create a cycle. Return True if the edge is added.
+
+       Pearce & Kelly, ACM J. Exp. Algorithmics 11 (2006) : order
+       { node : index } is a topological order of graph, u -> v implies
+       order[u] < order[v]. Only an edge u -> v with order[v] < order[u]
+       is checked, by depth first search of the nodes ordered between v
+       and u, and those nodes are reordered.
+
+       Indices are 0, -1, -2, ... : a new node is ordered first, -len( order )
+       is the lowest index. A new upstream driver u of v needs no search.'''
+
+    for node in ( v, u ) :
+        if node not in order :
+            order[ node ] = -len( order )
+            graph.add_node( node )
+
+    lower, upper = order[ v ], order[ u ]
+
+    if lower < upper :
+        # Forward from v : nodes ordered <= upper. Cycle if u is reached.
+        forward, stack = { v }, [ v ]
+        while stack :
+            for w in graph.successors( stack.pop() ) :
+                if w == u :
+                    return False
+                if w not in forward and order[ w ] < upper :
+                    forward.add( w )
+                    stack.append( w )
+
+        # Backward from u : nodes ordered > lower
+        backward, stack = { u }, [ u ]
+        while stack :
+            for w in graph.predecessors( stack.pop() ) :
+                if w not in backward and order[ w ] > lower :
+                    backward.add( w )
+                    stack.append( w )
+
+        # Reorder : backward nodes before forward nodes in their indices
+        nodes   = sorted( backward, key = order.get ) + \
+                  sorted( forward,  key = order.get )
+        indices = sorted( order[ node ] for node in nodes )
+        for node, index in zip( nodes, indices ) :
+            order[ node ] = index
+
+    graph.add_edge( u, v )
+
+    return True
+
+#----------------------------------------------------------------------------
+def RankDrivers( iMatrix, D_numDrivers, threshold = 0, cmi = False,
+                 block = 1024 ) :
+    '''Top drivers of each iMatrix row : list of column index arrays.
+
+       As iMatrix.loc[ node ].sort_values()[ mask ][ :numDrivers ] with
+       mask values > threshold (>= threshold if cmi) excluding the node
+       and nan : the D_numDrivers[ node ] smallest values in ascending
+       order, ties in column order. Rows are ranked in blocks of block
+       rows with argpartition, EdgeMatrix edges in RankEdgeDrivers().'''
+
+    if isinstance( iMatrix, EdgeMatrix ) :
+        return RankEdgeDrivers( iMatrix, D_numDrivers, threshold, cmi )
+
+    N          = iMatrix.shape[0]
+    numDrivers = array( [ D_numDrivers.get( node, 0 )
+                          for node in iMatrix.index ], dtype = int )
+    k          = min( int( numDrivers.max( initial = 0 ) ), iMatrix.shape[1] )
+
+    topDrivers = []
+    for i in range( 0, N, block ) :
+        B = iMatrix.iloc[ i : i + block ].to_numpy( dtype = float )
+        rows = arange( B.shape[0] )
+
+        # Invalid drivers rank last as inf
+        with errstate( invalid = 'ignore' ) :
+            valid = B >= threshold if cmi else B > threshold
+        valid[ rows, rows + i ] = False
+        B = where( valid, B, inf )
+
+        if 0 < k < B.shape[1] :
+            candidates = argpartition( B, k - 1, axis = 1 )[ :, :k ]
+        else :
+            candidates = repeat( arange( B.shape[1] )[ None, : ],
+                                 B.shape[0], axis = 0 )[ :, :k ]
+
+        values = take_along_axis( B, candidates, axis = 1 )
+
+        # Ties at the k-th value : candidates are the first columns
+        if k :
+            kth  = values.max( axis = 1, keepdims = True )
+            ties = ( ( B == kth ).sum( axis = 1 ) >
+                     ( values == kth ).sum( axis = 1 ) ) & isfinite( kth[:,0] )
+            for row in rows[ ties ] :
+                candidates[ row ] = argsort( B[ row ], kind = 'stable' )[ :k ]
+                values    [ row ] = B[ row, candidates[ row ] ]
+
+        for row, cols, vals in zip( rows, candidates, values ) :
+            order = lexsort( ( cols, vals ) )[ : numDrivers[ i + row ] ]
+            order = order[ isfinite( vals[ order ] ) ]
+            topDrivers.append( cols[ order ] )
+
+    return topDrivers
+
+#----------------------------------------------------------------------------
+def RankEdgeDrivers( iMatrix, D_numDrivers, threshold = 0, cmi = False ) :
+    '''RankDrivers() of EdgeMatrix iMatrix : valid edges are sorted by
+       ( row, value, col ) and the first D_numDrivers[ node ] of each
+       row are kept. Return list of column index arrays.'''
+
+    N          = iMatrix.shape[0]
+    numDrivers = array( [ D_numDrivers.get( node, 0 )
+                          for node in iMatrix.index ], dtype = int )
+
+    with errstate( invalid = 'ignore' ) :
+        valid = iMatrix.value >= threshold if cmi else \
+                iMatrix.value >  threshold
+    valid &= iMatrix.row != iMatrix.col
+
+    row, col, value = iMatrix.row[valid], iMatrix.col[valid], iMatrix.value[valid]
+
+    order    = lexsort( ( col, value, row ) )
+    row, col = row[ order ], col[ order ]
+
+    # Rank of each edge in its row
+    rank = arange( len( row ) ) - searchsorted( row, arange( N ) )[ row ]
+    keep = rank < numDrivers[ row ]
+    row, col = row[ keep ], col[ keep ]
+
+    return split( col, searchsorted( row, arange( 1, N ) ) )
+
 #----------------------------------------------------------------------------
 def GetInteractionMatrix( interactionMatrix = None, interactionMatrixFile = None,
                           excludeColumns = [], verbose = False ) :
+    '''Interaction matrix DataFrame or EdgeMatrix from interactionMatrix
+       or interactionMatrixFile :
+         .csv .feather .parquet : NxN matrix, labels in column 0 or the
+             index, or edge list with columns source, target, weight
+         .npy .npz : InteractionMatrix --outMatrix files, ReadMatrixFile()
+       Edge lists and .npz are read into an EdgeMatrix.'''
+
     if verbose :
         print( f"Read Interaction Matrix {datetime.now()}", flush=True )
 
     if interactionMatrix is None :
-        # Set DataFrame index to column 0
-        iMatrix = read_csv( interactionMatrixFile, index_col = 0 )
+        iMatrix = ReadMatrixFile( interactionMatrixFile )
     else :
         iMatrix = interactionMatrix
 
-        if not isinstance( iMatrix, DataFrame ) :
-            err = 'GetInteractionMatrix() interactionMatrix must be DataFrame'
+        if not isinstance( iMatrix, ( DataFrame, EdgeMatrix ) ) :
+            err = 'GetInteractionMatrix() interactionMatrix must be ' +\
+                  'DataFrame or EdgeMatrix'
             raise RuntimeError( err )
 
     # Ensure index == columns : NxN matrix
@@ -217,11 +567,77 @@ def GetInteractionMatrix( interactionMatrix = None, interactionMatrixFile = None
         raise RuntimeError( err )
 
     if len( excludeColumns ) :
-        iMatrix.drop( index   = excludeColumns, inplace = True, errors='ignore' )
-        iMatrix.drop( columns = excludeColumns, inplace = True, errors='ignore' )
+        if isinstance( iMatrix, EdgeMatrix ) :
+            iMatrix = iMatrix.drop( excludeColumns )
+        else :
+            iMatrix.drop( index   = excludeColumns, inplace = True,
+                          errors  = 'ignore' )
+            iMatrix.drop( columns = excludeColumns, inplace = True,
+                          errors  = 'ignore' )
 
     return iMatrix
 
+#----------------------------------------------------------------------------
+def ReadMatrixFile( matrixFile ):
+    '''Read interaction matrix file into DataFrame or EdgeMatrix.
+       .npy : memory mapped matrix, labels in matrixFile .labels
+       .npz : top k sparse matrix ( labels, row, col, value ) EdgeMatrix,
+              values not in the top k are nan
+       .csv .feather .parquet : NxN matrix or source, target, weight
+              edge list EdgeMatrix ( EdgeListMatrix() )'''
+
+    if matrixFile.endswith( '.npz' ) :
+        with load( matrixFile ) as npz :
+            return EdgeMatrix( npz['labels'].tolist(), npz['row'],
+                               npz['col'], npz['value'] )
+
+    if not matrixFile.endswith( '.npy' ) :
+        if matrixFile.endswith( '.feather' ) :
+            matrixDF = read_feather( matrixFile )
+        elif matrixFile.endswith( '.parquet' ) :
+            matrixDF = read_parquet( matrixFile )
+        else :
+            with open( matrixFile ) as fob :
+                header = fob.readline().strip().split( ',' )
+            if header == edgeListColumns :
+                matrixDF = read_csv( matrixFile )
+            else :
+                # Set DataFrame index to column 0
+                return read_csv( matrixFile, index_col = 0 )
+
+        if list( matrixDF.columns ) == edgeListColumns :
+            return EdgeListMatrix( matrixDF )
+
+        if not matrixDF.index.equals( matrixDF.columns ) :
+            matrixDF = matrixDF.set_index( matrixDF.columns[0] )
+            matrixDF.index.name = None
+
+        return matrixDF
+
+    matrix = load( matrixFile, mmap_mode = 'r' )
+    with open( matrixFile[:-4] + '.labels' ) as fob :
+        labels = fob.read().splitlines()
+
+    if matrix.shape != ( len( labels ), len( labels ) ) :
+        err = f'ReadMatrixFile() {matrixFile} shape {matrix.shape} ' +\
+              f'does not match {len( labels )} labels'
+        raise RuntimeError( err )
+
+    return DataFrame( matrix, index = labels, columns = labels, copy = False )
+
+#----------------------------------------------------------------------------
+def EdgeListMatrix( edgeDF ):
+    '''EdgeMatrix of edge list DataFrame with columns source ( driver ),
+       target ( driven node ), weight. Labels are in order of first
+       appearance in source then target.'''
+
+    codes, labels = factorize( concatenate( ( edgeDF[ 'source' ].to_numpy(),
+                                              edgeDF[ 'target' ].to_numpy() ) ) )
+    N = len( edgeDF )
+
+    return EdgeMatrix( labels.tolist(), codes[ N: ], codes[ :N ],
+                       edgeDF[ 'weight' ].to_numpy( dtype = float ) )
+
 #----------------------------------------------------------------------------
 def GetNodeDrivers( driversFile = None, driversColumns = ['column','E'],
                     numDrivers = 1, columns = None,
@@ -287,11 +703,53 @@ def ReadNodeDrivers( driversFile = None, verbose = False, debug = False ):
 
     return nodeDF
 
+#----------------------------------------------------------------------------
+def ReadBatchFile( batchFile, args ):
+    '''Read CreateNetworks() networks from .csv batchFile, one network
+       per row. Columns outputFile and targetCols ( space separated ) are
+       required. Columns threshold, numDrivers, driversFile, cmi are
+       optional, missing columns or values are set from args.'''
+
+    batchDF = read_csv( batchFile, dtype = str, keep_default_na = False )
+
+    for column in [ 'outputFile', 'targetCols' ] :
+        if column not in batchDF.columns :
+            err = f'ReadBatchFile() {batchFile} column {column} required'
+            raise RuntimeError( err )
+
+    networks = []
+    for row in batchDF.to_dict( 'records' ) :
+        cmi = row.get( 'cmi', '' ).strip()
+
+        networks.append( {
+            'targetCols'     : row[ 'targetCols' ].split(),
+            'threshold'      : float( row.get( 'threshold', '' ) or
+                                      args.threshold ),
+            'numDrivers'     : int( row.get( 'numDrivers', '' ) or
+                                    args.numDrivers ),
+            'driversFile'    : row.get( 'driversFile', '' ) or args.driversFile,
+            'driversColumns' : args.driversColumns,
+            'cmi'            : cmi.lower() in [ 'true', '1' ] if cmi \
+                               else args.cmi,
+            'outputFile'     : row[ 'outputFile' ] } )
+
+    return networks
+
 #----------------------------------------------------------------------------
 def CreateNetwork_CmdLine():
     '''Wrapper for CreateNetwork with command line parsing'''
 
     args = ParseCmdLine()
+
+    if args.batchFile :
+        CreateNetworks( ReadBatchFile( args.batchFile, args ),
+                        interactionMatrixFile = args.interactionMatrixFile,
+                        excludeColumns = args.excludeColumns,
+                        cores          = args.cores,
+                        mpMethod       = args.mpMethod,
+                        verbose        = args.verbose )
+        return
+
     # Call CreateNetwork()
     n = CreateNetwork( None,
                        interactionMatrixFile = args.interactionMatrixFile,
@@ -322,7 +780,8 @@ def ParseCmdLine():
                         dest    = 'interactionMatrixFile', type = str, 
                         action  = 'store',
                         default = None,
-                        help    = 'Interaction matrix file: .csv or .feather.')
+                        help    = 'Interaction matrix file: .csv .npy .npz ' +\
+                                  '.feather .parquet or source,target,weight')
 
     parser.add_argument('-t', '--targetCols', nargs = '+',
                         dest    = 'targetCols', type = str, 
@@ -364,7 +823,24 @@ def ParseCmdLine():
     parser.add_argument('-o', '--outputFile',
                         dest    = 'outputFile', type = str, 
                         action  = 'store', default = None,
-                        help    = 'Output file name.')
+                        help    = 'Output file name: .pkl .json .npz')
+
+    parser.add_argument('-b', '--batchFile',
+                        dest    = 'batchFile', type = str,
+                        action  = 'store', default = None,
+                        help    = 'Batch .csv of networks: outputFile, ' +\
+                                  'targetCols, [threshold, numDrivers, ' +\
+                                  'driversFile, cmi]')
+
+    parser.add_argument('-cr', '--cores',
+                        dest   = 'cores', type = int,
+                        action = 'store', default = 4,
+                        help   = 'Batch network multiprocessing cores.')
+
+    parser.add_argument('-mp', '--mpMethod',
+                        dest    = 'mpMethod', type = str,
+                        action  = 'store', default = None,
+                        help    = 'Multiprocessing start method')
 
     parser.add_argument('-P', '--plotNetwork',
                         dest   = 'plotNetwork', 
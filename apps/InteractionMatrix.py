@@ -1,26 +1,42 @@
 #! /usr/bin/env python3
 
 # Python distribution modules
-import argparse, pickle
+import argparse, json, pickle, sqlite3
 from   datetime           import datetime
-from   math               import nan
-from   itertools          import combinations_with_replacement, repeat
+from   math               import comb, nan
+from   functools          import partial
+from   hashlib            import sha1
+from   itertools          import chain, combinations, permutations
 from   concurrent.futures import ProcessPoolExecutor
 from   multiprocessing    import get_context
+from   multiprocessing.shared_memory import SharedMemory
 
 # Community modules
-import matplotlib.pyplot as plt
-from   numpy  import zeros, full, corrcoef, amax, min, max, abs, maximum
-from   numpy  import linspace, quantile
+from   numpy  import concatenate, full, empty, amax, min, max, abs, maximum, sqrt
+from   numpy  import linspace, quantile, ndarray, where, errstate
+from   numpy  import fill_diagonal, float32, arange, repeat, savez
+from   numpy.lib.format import open_memmap
 from   pandas import DataFrame
+from   pandas.util import hash_pandas_object
 
-from   pyEDM import CCM, Simplex, ComputeError, PredictNonlinear
-from   sklearn.linear_model      import LinearRegression
-from   sklearn.feature_selection import mutual_info_regression as MI
-from   statsmodels.distributions.empirical_distribution import ECDF
+# pyEDM, sklearn, statsmodels, matplotlib, gmn.CrossMap (scipy.spatial)
+# and gmn.MutualInfo (scipy.special) are imported by the methods that
+# use them so workers only load what is requested
 
 # Local modules 
-from gmn.Auxiliary import ReadDataFrame
+from gmn.Auxiliary  import ReadDataFrame, InitWorker
+
+# Worker process data & args : set in InitInteractWorker()
+workerData = None
+workerArgs = None
+workerSHM  = None
+workerMI   = None # PrepareColumns() of workerData for --batch MI
+
+# SMap theta if args.theta not specified : pyEDM PredictNonlinear default
+defaultTheta = [ 0.01, 0.1, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 4, 5, 6, 7, 8, 9 ]
+
+# Largest pool chunksize : task counts are upper bounds ( --resume ... )
+maxChunksize = 256
 
 #----------------------------------------------------------------------------
 # Main module
@@ -94,7 +110,65 @@ def main():
        Efficiency is addressed by only allocating / processing
        according to values of: -ccm -cmap -smap -rho -rhoDiff -mi -nl -cmi
 
-       StarMapFunc() is run in a pool.starmap for all methods.
+       InteractFunc() is run in a Pool.imap_unordered for pair methods.
+       Data are copied once into shared memory that workers attach to in
+       InteractFunc(); tasks are column index pairs. Tasks are generated
+       lazily as the pool queues them, no O(N^2) task lists.
+
+       -smap : each ( column, target, theta ) of the PredictNonlinear
+       spectrum is one SMapFunc() task on the same pool, single threaded,
+       so that no more than --cores processes run. SMapCells() reduces
+       the rho( theta ) of each column : target to the nonlinearity.
+
+       -rho is computed for all columns at once in CorrelationMatrix()
+       in the parent. If no pair or batch methods are requested the
+       process pool is not started.
+
+       -b --batch : Simplex cross map (-cmap), CCM (-ccm), MI (-mi) and
+       MI_NL (-nl) of one column to all target columns in BatchFunc().
+       The column embedding and library neighbors of each CCM subsample
+       are computed once per column, not once per pair. MI is the KSG
+       estimator of sklearn with column scaling and sorted marginals
+       computed once per worker (gmn.MutualInfo). CMI is formed from the
+       CCM & MI matrices.
+
+       -st --store : results are written to an sqlite3 store as they
+       complete. -r --resume skips results in the store : the methods,
+       EDM and screening parameters and the data of the stored columns
+       must be the same. Data columns added since the store was written
+       are new : their rows & columns are computed.
+
+       -sh --shard i/n : compute the i-th of n round robin partitions of
+       the pair, batch and SMap tasks into --store, for instance on n
+       hosts with a shared filesystem. -mg --merge store files : assemble
+       the shard stores into the matrices and outputs, the same method
+       arguments as the shards are required. -rho is computed at merge.
+
+       -om --outMatrix : out of core matrices. Results are written as
+       they arrive to float32 memory mapped .npy files outMatrix_key.npy
+       with the column names, one per line, in outMatrix_key.labels.
+       -tk --topK k also writes the k drivers of each row that
+       CreateNetwork ranks first to outMatrix_key_topk.npz ( labels, row,
+       col, value ) : the k smallest values > -kT --rankThreshold
+       ( >= for CMI ). CreateNetwork reads the .npy and .npz files, the
+       networks are the same for --threshold rankThreshold and
+       --numDrivers <= k.
+
+       -ns --network file : stream a CreateNetwork network of the pool
+       method -nm --networkMethod from --networkTargets. Result cells
+       fill per row heaps of the top --networkDrivers drivers and the
+       network is discovered as the rows of its nodes complete, with
+       CreateNetwork DriverHeaps and StreamNetwork. Without -op -oc -om
+       -P matrices are not allocated and the pool stops when the network
+       is complete.
+
+       -sc --screen : two stage screening. All column : target cells are
+       scored with a cheap method ( rho, CrossMap at the CCM libMin
+       library size, or MI ) in ScreenCandidates(). Pool methods ( -ccm
+       -smap ... ) are computed only on the -sk --screenK targets of each
+       column that CreateNetwork ranks first by score : the smallest
+       scores > -kT --rankThreshold. Other cells are nan : CreateNetwork
+       ranking ignores nan.
 
        -i specifies columns from the data .csv file
 
@@ -124,95 +198,350 @@ def main():
     if len( args.lib  ) == 0 : args.lib  = [1, args.numRows]
     if len( args.pred ) == 0 : args.pred = [1, args.numRows]
 
-    # Iterable of upper triangular of all columns x columns since CCM()
-    # computes both CCM(i,j) and CCM(j,i); Start at 1 to skip first column
-    crossColumns = \
-        list( combinations_with_replacement( range( 1, args.numCols ), 2 ) )
-    N_ = len( crossColumns )
+    # Pool methods on column pairs or one column to all targets.
+    # Results are matrix cells ( method, row, col, value ) : ResultCells()
+    batchList = [ m for m in ( 'CrossMap', 'CCM', 'MI', 'MI_NL' )
+                  if args.batch and args.methodsMap[ m ] ]
+    pairList  = [ m for m in ( 'CCM', 'CrossMap', 'MI', 'MI_NL', 'CMI' )
+                  if args.methodsMap[ m ] and not args.batch ]
+    smapList  = [ 'SMap' ] if args.SMap else []
+
+    # Matrices to hold results : rows column, columns target
+    names    = data.columns[ 1: ].to_list()
+    position = { name : i for i, name in enumerate( names ) }
+
+    # --network only : no matrix outputs, matrices are not allocated
+    networkOnly = args.network and not ( args.outPickleFile or
+                  args.outCSVFile or args.outMatrix or args.plot )
+
+    matrix = {} if networkOnly else \
+             { m : NewMatrix( args, m, N - 1 )
+               for m in pairList + batchList + smapList }
+
+    # Streamed network : top drivers of rows from result cells
+    network = None
+    if args.network :
+        # Sibling app module : networkx is loaded only for --network
+        from CreateNetwork import DriverHeaps, StreamNetwork, WriteNetworkFile
+
+        if args.networkMethod not in pairList + batchList + smapList :
+            raise RuntimeError( f'--networkMethod {args.networkMethod} ' +\
+                                'must be a computed pool method: ' +\
+                                f'{pairList + batchList + smapList}' )
+        for target in args.networkTargets :
+            if target not in position :
+                raise RuntimeError( f'--networkTargets {target} not in data' )
+
+        network   = StreamNetwork( args.networkTargets )
+        heaps     = DriverHeaps( [ args.networkDrivers ] * ( N - 1 ),
+                                 args.networkThreshold,
+                                 cmi = args.networkMethod == 'CMI' )
+        rowsDone  = [ False ] * ( N - 1 ) # rows with all cells in heaps
+
+        def Drivers( node ):
+            row = position[ node ]
+            if rowsDone[ row ] :
+                return [ names[ col ] for col in heaps.Drivers( row ) ]
+
+    def AddCells( cells ):
+        '''Fill matrices and network heaps with cells'''
+        for cell in cells :
+            FillCell( matrix, position, cell )
+            if network and cell[0] == args.networkMethod :
+                heaps.Add( position[ cell[1] ], position[ cell[2] ], cell[3] )
+
+    # Store of result cells : cells of a previous run are not recomputed.
+    # Stored cells of columns not in data ( -i ) are not used.
+    store  = None
+    done   = set()
+    hashes = ColumnHashes( data ) if args.store or args.merge else None
+    if args.store :
+        store = OpenStore( args, hashes )
+
+        if args.resume :
+            for cell in ReadCells( store ) :
+                if cell[1] in position and cell[2] in position :
+                    done.add( cell[:3] )
+                    AddCells( [ cell ] )
+
+    # Merge shard stores : no tasks
+    if args.merge :
+        AddCells( [ cell for cell in MergeStores( args, hashes )
+                    if cell[1] in position and cell[2] in position ] )
+
+    # Screening : pool methods only on the top screenK cells of each row
+    candidates = None
+    if args.screen and not args.merge and \
+       len( pairList + batchList + smapList ) :
+        screenCols = ScreenCandidates( data, args )
+        candidates = { ( i, j ) for i, cols in enumerate( screenCols )
+                       for j in cols }
+
+    def Missing( m, col, target ):
+        '''Cell ( m, col, target ) data column indices is to be computed'''
+        return not args.merge and \
+               ( candidates is None or
+                 ( col - 1, target - 1 ) in candidates ) and \
+               ( m, names[ col - 1 ], names[ target - 1 ] ) not in done
+
+    def InShard( k ):
+        '''Task k of all tasks is in --shard i/n : round robin'''
+        return args.shard is None or k % args.shard[1] == args.shard[0] - 1
+
+    # Tasks are generated lazily, the pool reads them as it queues them :
+    # task lists are O(N^2) for large N ( --outMatrix ).
+    #
+    # Upper triangular of all columns x columns since CCM() computes
+    # both CCM(i,j) and CCM(j,i); Start at 1 to skip first column
+    def CrossColumns():
+        '''Pair tasks ( column, target ) of data column indices'''
+        if not pairList :
+            return
+        for k, ( col1, col2 ) in \
+            enumerate( combinations( range( 1, args.numCols ), 2 ) ) :
+            if InShard( k ) and \
+               any( Missing( m, col1, col2 ) or Missing( m, col2, col1 )
+                    for m in pairList ) :
+                yield ( col1, col2 )
+
+    # Batch tasks ( column, targets, MI targets ) of data column indices.
+    # Without MI_NL, MI is symmetric and computed for targets > column.
+    symmetricMI = 'MI' in batchList and 'MI_NL' not in batchList and \
+                  candidates is None
+    rowList     = [ m for m in batchList if not ( symmetricMI and m == 'MI' ) ]
+
+    def BatchColumns():
+        '''Batch tasks ( column, targets, MI targets )'''
+        if not batchList :
+            return
+        for col in range( 1, args.numCols ) :
+            if not InShard( col - 1 ) :
+                continue
+
+            targets = [ j for j in range( 1, args.numCols ) if j != col and
+                        any( Missing( m, col, j ) for m in rowList ) ]
+
+            miTargets = targets if 'MI' in rowList or 'MI_NL' in rowList \
+                        else []
+            if symmetricMI :
+                miTargets = [ j for j in range( col + 1, args.numCols )
+                              if Missing( 'MI', col, j ) ]
+
+            if len( targets ) or len( miTargets ) :
+                yield ( col, targets, miTargets )
+
+    # SMap tasks ( column, target, theta index ) : one pool process each.
+    # SMapCells() reduces the rho( theta ) of a column : target.
+    thetas    = args.theta if len( args.theta ) else defaultTheta
+    smapRho   = {} # { ( column, target ) : [ rho ] }
+
+    def SMapTasks():
+        '''SMap tasks ( column, target, theta index )'''
+        if not smapList :
+            return
+        for k, ( col, target ) in \
+            enumerate( permutations( range( 1, args.numCols ), 2 ) ) :
+            if InShard( k ) and Missing( 'SMap', col, target ) :
+                for i in range( len( thetas ) ) :
+                    yield ( col, target, i )
+
+    def TaskRows( task ):
+        '''Matrix rows of --networkMethod cells of a pool task'''
+        if len( task ) == 2 : # InteractFunc ( column, target )
+            return task if args.networkMethod in pairList else ()
+        if isinstance( task[1], list ) : # BatchFunc ( column, targets, MI )
+            if args.networkMethod not in batchList :
+                return ()
+            if symmetricMI and args.networkMethod == 'MI' :
+                return ( task[0], *task[2] )
+            return ( task[0], )
+        return ( task[0], ) if args.networkMethod == 'SMap' else ()
+
+    # Streamed network : number of pool tasks with cells in each row
+    if network :
+        rowTasks = [ 0 ] * ( N - 1 )
+        for task in chain( CrossColumns(), BatchColumns(), SMapTasks() ) :
+            for col in TaskRows( task ) :
+                rowTasks[ col - 1 ] += 1
+
+        for row, numTasks in enumerate( rowTasks ) :
+            rowsDone[ row ] = numTasks == 0
+        network.Discover( Drivers )
+
+    # Number of pair and SMap tasks without --resume, --screen for chunksize
+    numPairs = comb( args.numCols - 1, 2 ) // ( args.shard[1] if args.shard
+                                                else 1 )
+    N_       = numPairs if pairList else 0
+    N_SMap   = 2 * len( thetas ) * numPairs if smapList else 0
 
     if args.chunksize is None :
-        chunksize = maximum( 1, int( N_ / (2 * args.cores) ) )
+        chunksize = int( min( [ maxChunksize,
+                                max( [ 1, N_ // (2 * args.cores) ] ) ] ) )
     else :
         chunksize = args.chunksize
 
-    mpContext = get_context( args.mpMethod )
-
-    if args.verbose:
-        print( f'{datetime.now()} ProcessPoolExecutor: {args.mpMethod} ' +\
-               f'chunksize {chunksize} cores {args.cores}' )
-
-    # ProcessPoolExecutor has no starmap(). Pass argument lists directly.
-    with ProcessPoolExecutor( max_workers = args.cores,
-                              mp_context = mpContext ) as exe :
-        interact_ = exe.map( InteractFunc,
-                             crossColumns,
-                             repeat( data, N_ ),
-                             repeat( args, N_ ),
-                             timeout   = None,
-                             chunksize = chunksize )
-
-    # interact_ is a generator of dictionaries from InteractFunc
-    interactD_ = [ _ for _ in interact_ ]
-
-    if args.verbose:
-        print( f'{datetime.now()} Finished ProcessPoolExecutor' )
-        print( "Result has ", str( len( interactD_ ) ), " items." )
-
-    # Create matrices to hold results from InteractFunc()
-    CCM_mat = CM = CC = IXY = NL = rhoDiff = CMI = SMap = None
-    if args.CCM      : CCM_mat = full ( ( N - 1, N - 1 ), nan )
-    if args.CrossMap : CM      = full ( ( N - 1, N - 1 ), nan )
-    if args.rho      : CC      = full ( ( N - 1, N - 1 ), nan )
-    if args.MI       : IXY     = full ( ( N - 1, N - 1 ), nan )
-    if args.MI_NL    : NL      = full ( ( N - 1, N - 1 ), nan )
-    if args.CMI      : CMI     = full ( ( N - 1, N - 1 ), nan )
-    if args.SMap     : SMap    = full ( ( N - 1, N - 1 ), nan )
-
-    col1Names = [""] * ( N - 1 )
-    col2Names = [""] * ( N - 1 )
-
-    # Unpack the interactD_ list of dictionaries into matrices
-    for D in interactD_ :
-        if D is None :
-            continue
-
-        col1 = D['col1'] - 1  # Zero offset for time column
-        col2 = D['col2'] - 1
-
-        if args.CCM :
-            CCM_mat[ col1, col2 ] = D['CCM_XY']
-            CCM_mat[ col2, col1 ] = D['CCM_YX']
-        if args.CrossMap :
-            CM[ col1, col2 ] = D['CM_XY']
-            CM[ col2, col1 ] = D['CM_YX']
-        if args.rho :
-            CC[ col1, col2 ] = D['CC_XY']
-            CC[ col2, col1 ] = D['CC_YX']
-        if args.MI :
-            IXY[ col1, col2 ] = D['IXY']
-            IXY[ col2, col1 ] = D['IYX']
-        if args.MI_NL :
-            NL [ col1, col2 ] = D['NL_XY']
-            NL [ col2, col1 ] = D['NL_YX']
-        if args.CMI :
-            CMI[ col1, col2 ] = D['CMI_XY']
-            CMI[ col2, col1 ] = D['CMI_YX']
-        if args.SMap :
-            SMap[ col1, col2 ] = D['SMap_XY']
-            SMap[ col2, col1 ] = D['SMap_YX']
-
-        col1Names[ col1 ] = D['column']
-        col2Names[ col2 ] = D['target']
-
-        # if "reverse" names are empty, fill in
-        if not col1Names[ col2 ]: col1Names[ col2 ] = D['target']
-        if not col2Names[ col1 ]: col2Names[ col1 ] = D['column']
+    smapChunksize = int( min( [ maxChunksize,
+                                max( [ 1, N_SMap // (4 * args.cores) ] ) ] ) )
+
+    nResults = 0
+
+    if next( chain( CrossColumns(), BatchColumns(), SMapTasks() ),
+             None ) is not None :
+        mpContext = get_context( args.mpMethod )
+
+        if args.verbose:
+            print( f'{datetime.now()} Pool: ' +\
+                   f'{args.mpMethod} chunksize {chunksize} cores {args.cores}' +\
+                   f' pairs <= {N_} SMap <= {N_SMap}' )
+
+        # Data in shared memory, workers attach in InitInteractWorker()
+        shm, dataInfo = ShareData( data )
+
+        try:
+            with mpContext.Pool( processes   = args.cores,
+                                 initializer = InitInteractWorker,
+                                 initargs    = ( dataInfo, args ) ) as pool :
+                # Generators of ( task, dictionary ) from InteractFunc,
+                # BatchFunc, SMapFunc in order of completion. All tasks are
+                # queued on the args.cores workers.
+                interact_ = pool.imap_unordered( partial( TaskResult,
+                                                          InteractFunc ),
+                                                 CrossColumns(),
+                                                 chunksize = chunksize )
+                batch_    = pool.imap_unordered( partial( TaskResult,
+                                                          BatchFunc ),
+                                                 BatchColumns() )
+                smap_     = pool.imap_unordered( partial( TaskResult,
+                                                          SMapFunc ),
+                                                 SMapTasks(),
+                                                 chunksize = smapChunksize )
+
+                # Results are filled and stored as they arrive
+                for task, D in chain( interact_, batch_, smap_ ) :
+                    if 'theta' in D :
+                        cells = SMapCells( D, smapRho, len( thetas ), args )
+                    else :
+                        cells = ResultCells( D, args )
+
+                    if candidates is not None : # both directions of pairs
+                        cells = [ c for c in cells if
+                                  ( position[ c[1] ], position[ c[2] ] )
+                                  in candidates ]
+
+                    AddCells( cells )
+
+                    if store :
+                        StoreCells( store, cells )
+
+                    nResults = nResults + 1
+                    if store and nResults % 100 == 0 :
+                        store.commit()
+
+                    if network :
+                        for col in TaskRows( task ) :
+                            rowTasks[ col - 1 ] -= 1
+                            rowsDone[ col - 1 ] = rowTasks[ col - 1 ] == 0
+
+                        # Network complete : remaining tasks not needed
+                        if network.Discover( Drivers ) and networkOnly \
+                           and not store :
+                            pool.terminate()
+                            break
+        finally :
+            shm.close()
+            shm.unlink()
+            if store :
+                store.commit()
+
+        if args.verbose:
+            print( f'{datetime.now()} Finished Pool' )
+            print( "Result has ", str( nResults ), " items." )
+
+    if store :
+        store.close()
+
+    if network :
+        if not network.Discover( Drivers ) :
+            raise RuntimeError( '--network incomplete : rows of ' +\
+                                f'{list( network.explore_queue )[:5]} ' +\
+                                'have no results' )
+
+        WriteNetworkFile( args.network, network.Network(),
+                          args.networkTargets )
+        print( f'Network {args.network} {len( network.graph )} nodes ' +\
+               f'{datetime.now() - startTime}', flush = True )
+
+        if networkOnly :
+            print( "Normal Exit elapsed time: ", datetime.now() - startTime )
+            return
+
+    if args.shard :
+        print( f'Shard {args.shard[0]}/{args.shard[1]} results in ' +\
+               f'{args.store}. Merge shards with --merge' )
+        print( "Normal Exit elapsed time: ", datetime.now() - startTime )
+        return
+
+    # Screening : cells that are not candidates are nan
+    if candidates is not None :
+        for M_ in matrix.values() :
+            for i, cols in enumerate( screenCols ) :
+                values         = M_[ i, cols ]
+                M_[ i ]        = nan
+                M_[ i, cols ]  = values
+
+    CCM_mat = matrix.get( 'CCM'      )
+    CM      = matrix.get( 'CrossMap' )
+    IXY     = matrix.get( 'MI'       )
+    NL      = matrix.get( 'MI_NL'    )
+    CMI     = matrix.get( 'CMI'      )
+    SMap    = matrix.get( 'SMap'     )
+    CC      = rhoDiff = None
+
+    if args.rho :
+        CC = CorrelationMatrix( data.iloc[ :, 1: ].to_numpy( dtype = float ),
+                                out = NewMatrix( args, 'rho', N - 1 ) )
+        fill_diagonal( CC, nan ) # Ignore degenerate variables
+
+    # Data column names of matrix rows : columns
+    col1Names = names
+    col2Names = names
+
+    # Derived matrices in row blocks : matrices can be memory mapped
+    block = 1024
+
+    if args.batch and args.CMI :
+        CMI = NewMatrix( args, 'CMI', N - 1 )
+        for i in range( 0, N - 1, block ) :
+            CMI[ i : i + block ] = where( CCM_mat[ i : i + block ] > 0,
+                                          IXY[ i : i + block ], nan )
 
     # Gerald defines rhoDiff = max( CM, 0 ) - abs( CC )
     if args.rhoDiff :
-        CC      = abs( CC )
-        CM0     = maximum( CM, zeros( N - 1 ) )
-        rhoDiff = CM0 - CC
+        rhoDiff = NewMatrix( args, 'rhoDiff', N - 1 )
+        for i in range( 0, N - 1, block ) :
+            CC[ i : i + block ]      = abs( CC[ i : i + block ] )
+            rhoDiff[ i : i + block ] = maximum( CM[ i : i + block ], 0 ) - \
+                                       CC[ i : i + block ]
+
+    # Out of core matrices : flush .npy, write labels and top k
+    if args.outMatrix :
+        outMatrix = { 'CCM' : CCM_mat, 'CrossMap' : CM, 'MI' : IXY,
+                      'MI_NL' : NL, 'CMI' : CMI, 'SMap' : SMap,
+                      'rho' : CC, 'rhoDiff' : rhoDiff }
+
+        for key, M_ in outMatrix.items() :
+            if M_ is None or not args.methodsMap[ key ] :
+                continue
+
+            M_.flush()
+            fileName = f'{args.outMatrix}_{key}'
+            with open( fileName + '.labels', 'w' ) as fob :
+                fob.write( '\n'.join( names ) + '\n' )
+
+            if args.topK :
+                # CMI networks use threshold >= ( CreateNetwork --cmi )
+                WriteTopK( M_, names, args.topK, fileName + f'_top{args.topK}',
+                           args.rankThreshold, cmi = key == 'CMI' )
 
     # DataFrames of matrices
     CCM_df  = CM_df  = CC_df = IXY_df = NL_df = rhoDiff_df = None
@@ -310,6 +639,8 @@ def main():
 
     #-----------------------------------------
     if args.plot :
+        import matplotlib.pyplot as plt
+
         for key in args.methodsMap.keys() :
             value = args.methodsMap[ key ] # True or False
 
@@ -356,14 +687,20 @@ def main():
 
 #----------------------------------------------------------------------------
 #----------------------------------------------------------------------------
-def InteractFunc( crossColumns, data, args ):
-    '''Simplex cross map, CCM, Uncertainty coefficient, Pearsons rho,
-       Mutual Information Non Linearity & Pao's rho diff on one
-       pair of columns of the input data.
+def InteractFunc( crossColumns, data = None, args = None ):
+    '''Simplex cross map, CCM, Uncertainty coefficient and
+       Mutual Information Non Linearity on one pair of columns
+       of the input data. SMap is computed in SMapFunc().
 
        Since CCM returns X:Y and Y:X, also compute pairs of all metrics
+
+       If data and args are None use the worker data and args from
+       InitInteractWorker().
     '''
 
+    if data is None : data = workerData
+    if args is None : args = workerArgs
+
     col1 = crossColumns[ 0 ] # unpack columns from tuple
     col2 = crossColumns[ 1 ]
 
@@ -380,7 +717,9 @@ def InteractFunc( crossColumns, data, args ):
     # EDM Cross Map via Simplex
     #-------------------------------------------------------
     CM_XY = CM_YX = None
-    if args.CrossMap:
+    if args.CrossMap and not args.batch :
+        from pyEDM import Simplex, ComputeError
+
         S = Simplex( dataFrame       = data,
                      lib             = args.lib,
                      pred            = args.pred,
@@ -418,7 +757,9 @@ def InteractFunc( crossColumns, data, args ):
     # EDM CCM
     #-------------------------------------------------------
     CCM_XY = CCM_YX = None
-    if args.CCM:
+    if args.CCM and not args.batch :
+        from pyEDM import CCM
+
         # Setup libSizes with two values, one small, one near N
         libMin   = max( [ 10, int( args.libMinFraction * data.shape[0] ) ] )
         libMax   = data.shape[0] - abs( args.tau ) * args.E
@@ -448,19 +789,13 @@ def InteractFunc( crossColumns, data, args ):
         if deltaCCM_YX > args.deltaCCM :
             CCM_YX = cmap.iloc[1,2] # Large library value
 
-    #-------------------------------------------------------
-    # Linear correlation 
-    #-------------------------------------------------------
-    CC_XY = CC_YX = None
-    if args.rho:
-        CC_XY = corrcoef( x, y )[0,1]
-        CC_YX = CC_XY
-
     #-------------------------------------------------------
     # Non Linearity based on Mutual Information
     #-------------------------------------------------------
     IXY = IYX = NonLinear_XY = NonLinear_YX = None
-    if args.MI :
+    if args.MI and not args.batch :
+        from sklearn.feature_selection import mutual_info_regression as MI
+
         # Step 1: Mutual information of original variables.
         IXY = MI( x.reshape(-1,1), y,
                   discrete_features = False, n_neighbors = args.neighbors,
@@ -470,7 +805,10 @@ def InteractFunc( crossColumns, data, args ):
                   discrete_features = False, n_neighbors = args.neighbors,
                   copy = True, random_state = None )[0]
 
-    if args.MI_NL :
+    if args.MI_NL and not args.batch :
+        from sklearn.linear_model import LinearRegression
+        from statsmodels.distributions.empirical_distribution import ECDF
+
         # Step 2: Least-squares regression predicting Y given X.
         #         Y_ = predictions  residuals z = Y - Y_
         LM_XY = LinearRegression( copy_X = True, n_jobs = None )
@@ -537,20 +875,12 @@ def InteractFunc( crossColumns, data, args ):
     # CCM -> MI
     #-------------------------------------------------------
     CMI_XY = CMI_YX = None
-    if args.CMI:
+    if args.CMI and not args.batch :
         if CCM_XY > 0 :
             CMI_XY = IXY
         if CCM_YX > 0 :
             CMI_YX = IYX
 
-    #-------------------------------------------------------
-    # SMap NL
-    #-------------------------------------------------------
-    SMap_XY = SMap_YX = None
-    if args.SMap :
-        SMap_XY = PredictNL( column, target, args, data )
-        SMap_YX = PredictNL( target, column, args, data )
-
     #-------------------------------------------------------
     result = { 'col1'    : col1,
                'col2'    : col2,
@@ -560,50 +890,526 @@ def InteractFunc( crossColumns, data, args ):
                'CCM_YX'  : CCM_YX,
                'CM_XY'   : CM_XY,
                'CM_YX'   : CM_YX,
-               'CC_XY'   : CC_XY,
-               'CC_YX'   : CC_YX,
                'IXY'     : IXY,
                'IYX'     : IYX,
                'NL_XY'   : NonLinear_XY,
                'NL_YX'   : NonLinear_YX,
                'CMI_XY'  : CMI_XY,
-               'CMI_YX'  : CMI_YX,
-               'SMap_XY' : SMap_XY,
-               'SMap_YX' : SMap_YX }
+               'CMI_YX'  : CMI_YX }
 
     return result
 
 #----------------------------------------------------------------------------
 #----------------------------------------------------------------------------
-def PredictNL( column, target, args, data ):
-    '''SMap PredictNonlinear'''
+def CorrelationMatrix( values, block = 2048, out = None ):
+    '''Pearson correlation of all columns of values ( N x M ) : M x M
+       Rows of the matrix are computed in blocks of block columns
+       into out ( M x M ) if provided.'''
+
+    with errstate( divide = 'ignore', invalid = 'ignore' ) :
+        Z  = values - values.mean( axis = 0 )
+        Z /= sqrt( ( Z**2 ).sum( axis = 0 ) )
+
+    M  = values.shape[1]
+    CC = empty( ( M, M ) ) if out is None else out
+    for i in range( 0, M, block ) :
+        # Clip to [-1, 1] as numpy corrcoef
+        CC[ i : i + block ] = ( Z[ :, i : i + block ].T @ Z ).clip( -1, 1 )
+
+    return CC
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def BatchFunc( task, data = None, args = None ):
+    '''Simplex cross map, CCM, MI and MI_NL of one data column to
+       target data columns.
+       task : ( column, targets, MI targets ) data column indices
+       Returns { 'column', 'targets', 'CM', 'CCM', 'NL' : vectors over
+                 targets, 'miTargets', 'MI' : vector over MI targets }'''
+
+    global workerMI
+
+    if data is None : data = workerData
+    if args is None : args = workerArgs
+
+    col, targetCols, miCols = task
+
+    x       = data.iloc[ :, col ].to_numpy()
+    values  = data.iloc[ :, 1: ].to_numpy()
+    targets = data.iloc[ :, targetCols ].to_numpy()
+
+    CM = CCM = None
+    if args.CrossMap and len( targetCols ) :
+        from gmn.CrossMap import CrossMapColumn
+
+        CM = CrossMapColumn( x, targets,
+                             lib             = args.lib,
+                             pred            = args.pred,
+                             E               = args.E,
+                             Tp              = args.Tp,
+                             tau             = -1,
+                             exclusionRadius = args.exclusionRadius )
+
+    if args.CCM and len( targetCols ) :
+        from gmn.CrossMap import CCMColumn
+
+        # libSizes and convergence as InteractFunc()
+        libMin   = max( [ 10, int( args.libMinFraction * data.shape[0] ) ] )
+        libMax   = data.shape[0] - abs( args.tau ) * args.E
+        libSizes = [ libMin, libMax ]
+
+        rho = CCMColumn( x, targets,
+                         E               = args.E,
+                         libSizes        = libSizes,
+                         sample          = args.sample,
+                         Tp              = args.Tp,
+                         tau             = -1,
+                         exclusionRadius = args.exclusionRadius )
+
+        deltaCCM = rho[1] - rho[0]
+        CCM      = where( deltaCCM > args.deltaCCM, rho[1], 0 )
+
+    MI = NL = None
+    if ( args.MI or args.MI_NL ) and len( miCols ) :
+        from gmn.MutualInfo import PrepareColumns, MutualInfoColumn
+
+        # Scaled & sorted columns once per worker
+        if workerMI is None or data is not workerData :
+            workerMI = PrepareColumns( values )
+        scaled, sortedValues = workerMI
+
+        miIndex = [ j - 1 for j in miCols ] # values column index
+        MI, NL  = MutualInfoColumn( col - 1, values, scaled, sortedValues,
+                                    k         = args.neighbors,
+                                    nonLinear = args.MI_NL,
+                                    columns   = miIndex )
+        MI = MI[ miIndex ]
+        if args.MI_NL :
+            NL = NL[ miIndex ] # MI_NL : miCols are targetCols
+
+    return { 'column'    : data.columns[ col ],
+             'targets'   : data.columns[ targetCols ].to_list(),
+             'miTargets' : data.columns[ miCols ].to_list(),
+             'CM'        : CM,
+             'CCM'       : CCM,
+             'MI'        : MI,
+             'NL'        : NL }
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ResultCells( D, args ):
+    '''List of matrix cells ( method, row, col, value ) of an InteractFunc
+       or BatchFunc result dictionary D. Row is column, col is target.'''
+
+    cells = []
+
+    def Cell( method, row, col, value ):
+        value = None if value is None else float( value ) # None is nan
+        cells.append( ( method, row, col, value ) )
+
+    if 'targets' in D : # BatchFunc
+        row = D['column']
+        for method, key in [ ( 'CrossMap', 'CM' ), ( 'CCM', 'CCM' ),
+                             ( 'MI_NL', 'NL' ) ] :
+            if D[ key ] is not None :
+                for col, value in zip( D['targets'], D[ key ] ) :
+                    Cell( method, row, col, value )
+
+        if D['MI'] is not None :
+            for col, value in zip( D['miTargets'], D['MI'] ) :
+                Cell( 'MI', row, col, value )
+                if not args.MI_NL : # symmetric
+                    Cell( 'MI', col, row, value )
+
+    else : # InteractFunc : pair column : target
+        keys = { 'CCM'      : ( 'CCM_XY',  'CCM_YX'  ),
+                 'CrossMap' : ( 'CM_XY',   'CM_YX'   ),
+                 'MI'       : ( 'IXY',     'IYX'     ),
+                 'MI_NL'    : ( 'NL_XY',   'NL_YX'   ),
+                 'CMI'      : ( 'CMI_XY',  'CMI_YX'  ) }
+
+        for method, ( keyXY, keyYX ) in keys.items() :
+            if args.methodsMap[ method ] and not args.batch :
+                Cell( method, D['column'], D['target'], D[ keyXY ] )
+                Cell( method, D['target'], D['column'], D[ keyYX ] )
+
+    return cells
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def FillCell( matrix, position, cell ):
+    '''Set matrix[ method ][ row, col ] from cell if method, row, col
+       are in matrix and position { column name : matrix index }'''
 
-    if len( args.theta ) :
-        # theta specified
-        numProcess = min( [ len( args.theta ), args.cores ] ) # numpy min
+    method, row, col, value = cell
+
+    if method in matrix and row in position and col in position :
+        matrix[ method ][ position[ row ], position[ col ] ] = \
+            nan if value is None else value
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def OpenStore( args, hashes ):
+    '''Open sqlite3 result store args.store of matrix cells.
+
+       Table cells ( method, row, col, value ) holds results as they
+       complete. Table parameters holds the method parameters of the run,
+       table columns the ColumnHashes() of the data columns : --resume
+       requires the same parameters and data of the stored columns. Data
+       columns not in the store are new : --resume computes their cells.
+       A new run clears the store.'''
+
+    store = sqlite3.connect( args.store )
+    store.execute( 'CREATE TABLE IF NOT EXISTS parameters ' +\
+                   '( key TEXT PRIMARY KEY, value TEXT )' )
+    store.execute( 'CREATE TABLE IF NOT EXISTS columns ' +\
+                   '( name TEXT PRIMARY KEY, hash TEXT )' )
+    store.execute( 'CREATE TABLE IF NOT EXISTS cells ' +\
+                   '( method TEXT, row TEXT, col TEXT, value REAL, ' +\
+                   'PRIMARY KEY ( method, row, col ) )' )
+
+    # --resume of a new store : nothing to check
+    stored = store.execute( "SELECT value FROM parameters WHERE " +\
+                            "key = 'parameters'" ).fetchone()
+    if args.resume and stored is not None :
+        try :
+            newNames = CheckStore( store, args.store, args, hashes )
+        except RuntimeError :
+            store.close()
+            raise
+        if newNames :
+            print( f'OpenStore(): {args.store} adding {len( newNames )} ' +\
+                   f'columns : {newNames}' )
     else :
-        # theta not specified, pyEDM default has 15 values
-        numProcess = min( [ 15, args.cores ] )
+        store.execute( 'DELETE FROM cells' )
+        store.execute( 'DELETE FROM columns' )
 
-    #-------------------------------------------------------
-    #    DataFrame with columns theta and rho. 
-    #-------------------------------------------------------
-    DF = PredictNonlinear( dataFrame       = data,
-                           lib             = args.lib,
-                           pred            = args.pred,
-                           theta           = args.theta,
-                           E               = args.E,
-                           tau             = args.tau,
-                           exclusionRadius = args.exclusionRadius,
-                           Tp              = args.Tp,
-                           columns         = column,
-                           target          = target,
-                           embedded        = False,
-                           verbose         = False,
-                           numProcess      = numProcess,
-                           showPlot        = False )
-
-    rho = DF[ 'rho' ]
+    store.execute( "INSERT OR REPLACE INTO parameters VALUES " +\
+                   "( 'parameters', ? )", ( StoreParameters( args ), ) )
+    store.executemany( 'INSERT OR REPLACE INTO columns VALUES ( ?, ? )',
+                       hashes.items() )
+    store.commit()
+
+    return store
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def StoreParameters( args ):
+    '''JSON of the parameters that results in a store depend on : methods,
+       EDM parameters and screening'''
+
+    return json.dumps( { key : vars( args )[ key ] for key in
+        [ 'methodsMap', 'E', 'Tp', 'tau', 'exclusionRadius', 'lib', 'pred',
+          'theta', 'sample', 'neighbors', 'deltaCCM', 'deltaSMap', 'minRho',
+          'libMinFraction', 'screen', 'screenK', 'rankThreshold' ] } )
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ColumnHashes( data ):
+    '''{ column : sha1 hex digest of the column values } of data'''
+
+    return { column : sha1( hash_pandas_object( data[ column ],
+                                                index = False ).values
+                          ).hexdigest() for column in data.columns }
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def CheckStore( store, storeFile, args, hashes ):
+    '''Raise RuntimeError if the StoreParameters() or the column hashes of
+       store differ from args and data hashes. Return the data columns
+       not in store.'''
+
+    parameters = StoreParameters( args )
+
+    stored = store.execute( "SELECT value FROM parameters WHERE " +\
+                            "key = 'parameters'" ).fetchone()
+    if stored is None or stored[0] != parameters :
+        raise RuntimeError( f'CheckStore(): {storeFile} parameters {stored} '+\
+                            f'do not match {parameters}' )
+
+    storedHashes = dict( store.execute( 'SELECT name, hash FROM columns' ) )
+    changed = [ name for name, hash_ in storedHashes.items()
+                if name in hashes and hashes[ name ] != hash_ ]
+    if changed :
+        raise RuntimeError( f'CheckStore(): {storeFile} data columns ' +\
+                            f'{changed} do not match {args.dataFile}' )
+
+    return [ name for name in hashes if name not in storedHashes ]
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def MergeStores( args, hashes ):
+    '''List of cells of the --shard stores args.merge. The stored
+       parameters and column hashes of each store must match args and
+       the data.'''
+
+    cells = []
+    for storeFile in args.merge :
+        store = sqlite3.connect( f'file:{storeFile}?mode=ro', uri = True )
+        try :
+            CheckStore( store, storeFile, args, hashes )
+            cells.extend( ReadCells( store ) )
+        finally :
+            store.close()
+
+    if args.verbose :
+        print( f'MergeStores(): {len( cells )} cells from {args.merge}' )
+
+    return cells
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def StoreCells( store, cells ):
+    '''Insert or replace cells in store. Caller commits.'''
+
+    store.executemany( 'INSERT OR REPLACE INTO cells VALUES ( ?, ?, ?, ? )',
+                       cells )
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ReadCells( store ):
+    '''List of all cells ( method, row, col, value ) in store'''
+
+    return store.execute( 'SELECT method, row, col, value FROM cells' ).fetchall()
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def NewMatrix( args, key, M ):
+    '''M x M matrix of nan. If args.outMatrix a float32 memory mapped
+       .npy file args.outMatrix_key.npy, else in memory.'''
+
+    if not args.outMatrix :
+        return full( ( M, M ), nan )
+
+    matrix = open_memmap( f'{args.outMatrix}_{key}.npy', mode = 'w+',
+                          dtype = float32, shape = ( M, M ) )
+    matrix[:] = nan
+
+    return matrix
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ScreenCandidates( data, args ):
+    '''Screening stage : score all column : target cells with the cheap
+       args.screen method and return the column indices of the
+       args.screenK targets of each matrix row that CreateNetwork ranks
+       first, RankRows() with --rankThreshold ( list of arrays ).
+
+       rho      : | Pearson correlation | from CorrelationMatrix()
+       CrossMap : Simplex cross map with library size of CCM libMin
+       MI       : KSG mutual information ( gmn.MutualInfo )'''
+
+    values = data.iloc[ :, 1: ].to_numpy( dtype = float )
+    M      = values.shape[1]
+
+    if args.screen == 'rho' :
+        score = abs( CorrelationMatrix( values ) )
+    else :
+        score = empty( ( M, M ) )
+        shm, dataInfo = ShareData( data )
+
+        try:
+            with ProcessPoolExecutor( max_workers = args.cores,
+                                      mp_context  = get_context( args.mpMethod ),
+                                      initializer = InitInteractWorker,
+                                      initargs    = ( dataInfo, args ) ) as exe :
+                for col, rho in exe.map( ScreenFunc, range( 1, M + 1 ) ) :
+                    score[ col - 1 ] = rho
+        finally :
+            shm.close()
+            shm.unlink()
+
+    fill_diagonal( score, nan )
+
+    screenCols = RankRows( score, data.columns[ 1: ].to_list(),
+                           args.screenK, args.rankThreshold )
+
+    if args.verbose :
+        print( f'{datetime.now()} ScreenCandidates() {args.screen} ' +\
+               f'{sum( len( cols ) for cols in screenCols )} candidates' )
+
+    return screenCols
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ScreenFunc( col, data = None, args = None ):
+    '''Screening score of data column col to all data columns :
+       Simplex cross map at library size of CCM libMin, or KSG MI.
+       Returns ( col, score vector )'''
+
+    global workerMI
+
+    if data is None : data = workerData
+    if args is None : args = workerArgs
+
+    values = data.iloc[ :, 1: ].to_numpy()
+
+    if args.screen == 'MI' :
+        from gmn.MutualInfo import PrepareColumns, MutualInfoColumn
+
+        if workerMI is None or data is not workerData :
+            workerMI = PrepareColumns( values )
+        scaled, sortedValues = workerMI
+
+        score, _ = MutualInfoColumn( col - 1, values, scaled, sortedValues,
+                                     k = args.neighbors )
+    else :
+        from gmn.CrossMap import CrossMapColumn
+
+        # Library of CCM libMin rows at the start of args.lib
+        libMin = max( [ 10, int( args.libMinFraction * data.shape[0] ) ] )
+        lib    = [ args.lib[0], min( [ args.lib[0] + libMin, args.lib[1] ] ) ]
+
+        score = CrossMapColumn( data.iloc[ :, col ].to_numpy(), values,
+                                lib             = lib,
+                                pred            = args.pred,
+                                E               = args.E,
+                                Tp              = args.Tp,
+                                tau             = -1,
+                                exclusionRadius = args.exclusionRadius )
+
+    return col, score
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def RankRows( matrix, names, k, threshold = 0, cmi = False ):
+    '''Column indices of the k drivers of each matrix row ranked first
+       by CreateNetwork RankDrivers() ( list of arrays ) : the k smallest
+       values > threshold ( >= if cmi ) excluding the diagonal and nan.'''
+
+    # Sibling app module : networkx is loaded only for ranking
+    from CreateNetwork import RankDrivers
+
+    return RankDrivers( DataFrame( matrix, names, names, copy = False ),
+                        dict.fromkeys( names, k ), threshold, cmi )
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def WriteTopK( matrix, names, k, fileName, threshold = 0, cmi = False ):
+    '''Write the k drivers of each matrix row CreateNetwork ranks first,
+       RankRows(), to fileName.npz as sparse arrays : labels, row, col,
+       value. CreateNetwork reads the file as an EdgeMatrix.'''
+
+    drivers = RankRows( matrix, names, k, threshold, cmi )
+
+    row = repeat( arange( len( drivers ) ),
+                  [ len( cols ) for cols in drivers ] ).astype( 'int32' )
+    col = concatenate( [ [], *drivers ] ).astype( 'int32' )
+
+    savez( fileName, labels = names, row = row, col = col,
+           value = matrix[ row, col ] )
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ShareData( data ):
+    '''Copy data columns 1: into shared memory as float64.
+       Returns SharedMemory object and dataInfo dict for workers.
+       The caller must close() and unlink() the SharedMemory.'''
+
+    values = data.iloc[ :, 1: ].to_numpy( dtype = float )
+
+    shm = SharedMemory( create = True, size = values.nbytes )
+    ndarray( values.shape, dtype = values.dtype, buffer = shm.buf )[:] = values
+
+    dataInfo = { 'name'    : shm.name,
+                 'shape'   : values.shape,
+                 'dtype'   : values.dtype,
+                 'columns' : data.columns.to_list(),
+                 'time'    : data.iloc[ :, 0 ].to_numpy() }
+
+    return shm, dataInfo
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def TaskResult( func, task ):
+    '''Pool function : ( task, func( task ) ) of InteractFunc, BatchFunc
+       or SMapFunc. Results of imap_unordered are matched to tasks.'''
+    return task, func( task )
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def InitInteractWorker( dataInfo, args ):
+    '''Pool initializer : attach shared memory data.
+       Set workerData DataFrame ( time + data columns ), workerArgs.
+       BLAS threads are capped to 1 : one thread per worker.'''
+
+    global workerData, workerArgs, workerSHM
+
+    InitWorker( threads = 1 )
+
+    workerSHM = SharedMemory( name = dataInfo[ 'name' ] )
+
+    values = ndarray( dataInfo[ 'shape' ], dtype = dataInfo[ 'dtype' ],
+                      buffer = workerSHM.buf )
+
+    columns    = dataInfo[ 'columns' ]
+    workerData = DataFrame( values, columns = columns[1:], copy = False )
+    workerData.insert( 0, columns[0], dataInfo[ 'time' ] )
+    workerArgs = args
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def SMapFunc( task, data = None, args = None ):
+    '''SMap rho of one column : target at one theta : one task of the
+       pyEDM PredictNonlinear theta spectrum.
+       task : ( column, target, theta index ) data column indices
+       Returns { 'column', 'target', 'theta' : theta index, 'rho' }'''
+
+    from pyEDM import SMap, ComputeError
+
+    if data is None : data = workerData
+    if args is None : args = workerArgs
+
+    col, target, i = task
+
+    column = data.columns[ col ]
+    target = data.columns[ target ]
+    theta  = ( args.theta if len( args.theta ) else defaultTheta )[ i ]
+
+    # kdWorkers = 1 : one thread per pool process
+    S = SMap( dataFrame       = data,
+              columns         = column,
+              target          = target,
+              lib             = args.lib,
+              pred            = args.pred,
+              E               = args.E,
+              Tp              = args.Tp,
+              tau             = args.tau,
+              theta           = theta,
+              exclusionRadius = args.exclusionRadius,
+              embedded        = False,
+              kdWorkers       = 1 )
+
+    df  = S[ 'predictions' ]
+    err = ComputeError( df[ 'Observations' ], df[ 'Predictions' ] )
+
+    return { 'column' : column, 'target' : target,
+             'theta'  : i,      'rho'    : err[ 'rho' ] }
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def SMapCells( D, smapRho, numTheta, args ):
+    '''Reduce SMapFunc results D into smapRho { ( column, target ) :
+       [ rho ] }. When all numTheta rho of a column : target are in,
+       return the SMap cell of the nonlinearity : [ ( 'SMap', column,
+       target, nonLinear ) ], else [].'''
+
+    key = ( D[ 'column' ], D[ 'target' ] )
+    rho = smapRho.setdefault( key, [ None ] * numTheta )
+    rho[ D[ 'theta' ] ] = D[ 'rho' ]
+
+    if None in rho :
+        return []
+
+    del smapRho[ key ]
+    nonLinear = SMapNonLinear( rho, args, *key )
+
+    return [ ( 'SMap', *key, float( nonLinear ) ) ]
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def SMapNonLinear( rho, args, column = None, target = None ):
+    '''SMap nonlinearity of rho( theta ), PredictNonlinear spectrum'''
 
     # Does theta : rho exhibit nonlinearity?
     #   maxRho - thetaRho (theta = 0?) greater than args.delta ?
@@ -745,6 +1551,84 @@ def ParseCmdLine():
                         action = 'store', default = 6,
                         help = 'CSV file numerical precision.')
 
+    parser.add_argument('-b', '--batch',
+                        dest   = 'batch',
+                        action = 'store_true', default = False,
+                        help = 'Batch cross map, CCM & MI of each column to all targets.')
+
+    parser.add_argument('-sh', '--shard',
+                        dest   = 'shard', type = str,
+                        action = 'store', default = None,
+                        help = 'Compute shard i/n (1 <= i <= n) into --store.')
+
+    parser.add_argument('-mg', '--merge', nargs = '+',
+                        dest   = 'merge', type = str,
+                        action = 'store', default = [],
+                        help = 'Merge --shard store files.')
+
+    parser.add_argument('-om', '--outMatrix',
+                        dest   = 'outMatrix', type = str,
+                        action = 'store', default = None,
+                        help = 'Out of core float32 .npy matrix file prefix.')
+
+    parser.add_argument('-tk', '--topK',
+                        dest   = 'topK', type = int,
+                        action = 'store', default = 0,
+                        help = 'Write top k of each row with --outMatrix.')
+
+    parser.add_argument('-kT', '--rankThreshold',
+                        dest   = 'rankThreshold', type = float,
+                        action = 'store', default = 0,
+                        help = 'CreateNetwork --threshold of --topK, --screen')
+
+    parser.add_argument('-sc', '--screen',
+                        dest   = 'screen', type = str,
+                        action = 'store', default = None,
+                        choices = [ 'rho', 'CrossMap', 'MI' ],
+                        help = 'Screen cells with rho, CrossMap or MI.')
+
+    parser.add_argument('-sk', '--screenK',
+                        dest   = 'screenK', type = int,
+                        action = 'store', default = 10,
+                        help = 'Number of screened targets per column.')
+
+    parser.add_argument('-st', '--store',
+                        dest   = 'store', type = str,
+                        action = 'store', default = None,
+                        help = 'Result store file (sqlite3).')
+
+    parser.add_argument('-r', '--resume',
+                        dest   = 'resume',
+                        action = 'store_true', default = False,
+                        help = 'Resume from --store, skip stored results.')
+
+    parser.add_argument('-ns', '--network',
+                        dest   = 'network', type = str,
+                        action = 'store', default = None,
+                        help = 'Streamed network output file: .pkl .json .npz')
+
+    parser.add_argument('-nm', '--networkMethod',
+                        dest   = 'networkMethod', type = str,
+                        action = 'store', default = 'CCM',
+                        choices = [ 'CCM', 'CrossMap', 'MI', 'MI_NL',
+                                    'CMI', 'SMap' ],
+                        help = 'Pool method of the --network matrix.')
+
+    parser.add_argument('-nt', '--networkTargets', nargs = '+',
+                        dest   = 'networkTargets', type = str,
+                        action = 'store', default = [],
+                        help = 'Network target columns.')
+
+    parser.add_argument('-nT', '--networkThreshold',
+                        dest   = 'networkThreshold', type = float,
+                        action = 'store', default = 0,
+                        help = 'Network threshold of node interaction.')
+
+    parser.add_argument('-nd', '--networkDrivers',
+                        dest   = 'networkDrivers', type = int,
+                        action = 'store', default = 4,
+                        help = 'Network number of drivers.')
+
     parser.add_argument('-P', '--plot',
                         dest   = 'plot',
                         action = 'store_true',  default = False,
@@ -831,6 +1715,32 @@ def ParseCmdLine():
                         'MI_NL'   : args.MI_NL,
                         'CMI'     : args.CMI }
 
+    if args.topK and not args.outMatrix :
+        raise RuntimeError( "--topK requires --outMatrix" )
+
+    if args.shard :
+        try :
+            args.shard = tuple( int( x ) for x in args.shard.split( '/' ) )
+            if len( args.shard ) != 2 or \
+               not 1 <= args.shard[0] <= args.shard[1] :
+                raise ValueError
+        except ValueError :
+            raise RuntimeError( f"--shard {args.shard} must be i/n " +\
+                                "with 1 <= i <= n" )
+        if not args.store :
+            raise RuntimeError( "--shard requires --store" )
+        if args.merge :
+            raise RuntimeError( "--shard and --merge are exclusive" )
+
+    if args.network :
+        if not args.networkTargets :
+            raise RuntimeError( "--network requires --networkTargets" )
+        if args.shard :
+            raise RuntimeError( "--network requires all shards: --merge" )
+
+    if args.resume and not args.store :
+        raise RuntimeError( "--resume requires --store" )
+
     if not any( args.methodsMap.values() ) :
         raise RuntimeError( "No method specified. Options: " +\
                             "-a -smap -ccm -cmap -rho -rhoDiff -mi -nl -cmi" )
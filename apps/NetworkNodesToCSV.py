@@ -1,48 +1,77 @@
 #! /usr/bin/env python3
 
 # Python distribution modules
-from   argparse import ArgumentParser
-from   glob     import glob
-import pickle
+from   argparse           import ArgumentParser
+from   concurrent.futures import ProcessPoolExecutor
+from   glob               import glob
+from   os.path            import exists, getmtime
 
 # Community modules
-from pandas import DataFrame
+from pandas import DataFrame, Series
 
 # Local modules 
+from gmn.Network import ReadNetworkNodes
 
 #----------------------------------------------------------------------------
 #----------------------------------------------------------------------------
 def main():
-    '''Given a directory with CreateNetwork.py .pkl files 
-       For each network.pkl read the node names
+    '''Given a directory with CreateNetwork.py .pkl, .npz or .json files
+       For each network read the node names
        Write a .csv with each column a list of node names for a network
        The network file name is the column label.
+
+       Node names of .npz networks are read from the names array only.
+       A .pkl network with a .npz of the same name is read from the .npz
+       if the .npz is not older than the .pkl, the column is the .pkl.
+       Files that are not networks are reported and skipped.
+       Files are read in a process pool of --cores processes.
     '''
 
     args = ParseCmdLine()
 
-    pklFiles = glob( args.directory + '*.pkl' )
-
-    networkDict = {}
-
-    # for files ending in .pkl, load the network object
-    for fileName in pklFiles :
-
-        with open( fileName, 'rb' ) as f :
-            NetworkGraphDict = pickle.load( f )
-            Graph      = NetworkGraphDict[ 'Graph' ]
-            NetworkMap = NetworkGraphDict[ 'Map'   ] # Not used
-
-            networkDict[ fileName ] = [ n for n in Graph.nodes ]
-
-    # Create DataFrame
-    df = DataFrame( networkDict )
+    networkFiles = sorted( glob( args.directory + '*.pkl' ) )
+    pklStems     = { fileName[:-4] for fileName in networkFiles }
+    networkFiles = networkFiles + \
+        [ fileName for fileName in sorted( glob( args.directory + '*.npz' ) +
+                                           glob( args.directory + '*.json' ) )
+          if fileName[ : fileName.rfind( '.' ) ] not in pklStems ]
+
+    # Read .npz of a .pkl if present and current : names only
+    readFiles = [ fileName[:-4] + '.npz'
+                  if fileName.endswith( '.pkl' ) and
+                     exists( fileName[:-4] + '.npz' ) and
+                     getmtime( fileName[:-4] + '.npz' ) >= getmtime( fileName )
+                  else fileName for fileName in networkFiles ]
+
+    if args.cores > 1 and len( readFiles ) > 1 :
+        with ProcessPoolExecutor( max_workers = args.cores ) as exe :
+            nodes = list( exe.map( ReadNodes, readFiles, chunksize =
+                          max( 1, len( readFiles ) // ( 4 * args.cores ) ) ) )
+    else :
+        nodes = [ ReadNodes( fileName ) for fileName in readFiles ]
+
+    # Create DataFrame : networks of different size are padded
+    df = DataFrame( { fileName : Series( networkNodes, dtype = object )
+                      for fileName, networkNodes in zip( networkFiles, nodes )
+                      if networkNodes is not None } )
 
     if args.DEBUG :
         print( df )
     
     df.to_csv( args.outputFile, index = False )
 
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def ReadNodes( fileName ):
+    '''ReadNetworkNodes() of fileName, None if fileName is not a network'''
+
+    try :
+        return ReadNetworkNodes( fileName )
+    except Exception as err :
+        print( f'ReadNodes(): {fileName} is not a network, skipped : ' +\
+               f'{type( err ).__name__} {err}', flush = True )
+        return None
+
 #--------------------------------------------------------------
 #--------------------------------------------------------------
 def ParseCmdLine():
@@ -53,7 +82,7 @@ def ParseCmdLine():
                         dest    = 'directory', type = str, 
                         action  = 'store',
                         default = './',
-                        help    = 'Directory of network (.pkl) files.')
+                        help    = 'Directory of network (.pkl .npz .json) files.')
 
     parser.add_argument('-o', '--outputFile',
                         dest    = 'outputFile', type = str, 
@@ -61,6 +90,12 @@ def ParseCmdLine():
                         default = 'nodes.csv',
                         help    = '.csv output file')
 
+    parser.add_argument('-cr', '--cores',
+                        dest    = 'cores', type = int,
+                        action  = 'store',
+                        default = 4,
+                        help    = 'Multiprocessing cores.')
+
     parser.add_argument('-D', '--DEBUG',
                         dest   = 'DEBUG', # type = bool, 
                         action = 'store_true', default = False )
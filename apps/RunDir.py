@@ -1,8 +1,8 @@
 #! /usr/bin/env python3
 
 # Python distribution modules
-from multiprocessing import set_start_method, Pool
-from os import cpu_count, environ, listdir, sched_setaffinity, walk
+from multiprocessing import set_start_method, Pool, Queue
+from os import cpu_count, environ, listdir, walk
 from time import time
 
 # Community modules
@@ -11,9 +11,8 @@ from time import time
 import gmn
 from   gmn.CLI_Parser   import ParseCmdLine
 from   gmn.ConfigParser import ReadConfig
-
-# Reset core affinity to override BLAS, numpy binding to single core
-sched_setaffinity( 0, range( cpu_count() ) )
+from   gmn.Auxiliary    import PartitionCores, InitWorker, threadEnvironment
+from   gmn.Auxiliary    import sched_setaffinity
 
 #-------------------------------------------
 def CallGenerate( args, param ):
@@ -27,8 +26,11 @@ def main():
     '''GMN application command line interface
        Runs all config (.cfg) files found in args.configDir (-d).
 
-       Note : The product of -c --cores and -t --threads should not
-       exceed the cpu_count if using kedm.
+       Note : Each Pool worker is pinned to a disjoint set of -t --threads
+       cores and BLAS/OpenMP (kedm) threads are capped to --threads. If
+       cores * threads exceeds the available cores (affinity mask and
+       cgroup CPU quota) the number of workers is reduced. -na
+       --noAffinity disables pinning.
 
        Thanks to Keichi Takahashi
        ---------------------------------------------------------------------
@@ -40,6 +42,8 @@ def main():
        Note: OpenBLAS, used by pyEDM, kEDM etc., sets the core affinity
        when loaded and restricts the execution to one core only. When using
        separate spawned processes in Pool, must set the core affinity.
+       -ra --resetAffinity resets the affinity to all cores before the
+       cores are partitioned, overriding a taskset or cpuset mask.
        See : https://stackoverflow.com/questions/15639779/
        ---------------------------------------------------------------------
     '''
@@ -50,8 +54,9 @@ def main():
     if not args.configDir :
         raise RuntimeError( "No config file directory (-d) specified." )
 
-    # kedm : Kokkos : OpenMP
-    environ[ 'OMP_NUM_THREADS' ] = str( args.threads )
+    # kedm : Kokkos : OpenMP & BLAS threads inherited by spawned workers
+    for variable in threadEnvironment :
+        environ[ variable ] = str( args.threads )
     # gcc libgomp blocks multiprocess.Pool with default forked processes
     set_start_method( "spawn" )
 
@@ -70,7 +75,27 @@ def main():
     # Iterable of parameters for each configFile
     params = [ ReadConfig( args, configurationFile = f ) for f in configFiles ]
 
-    with Pool( processes = args.cores ) as pool:
+    # Reset core affinity to override BLAS, numpy binding to single core
+    if args.resetAffinity and sched_setaffinity is not None :
+        sched_setaffinity( 0, range( cpu_count() ) )
+
+    # Disjoint core set for each worker
+    coreQueue = None
+    if not args.noAffinity :
+        coreSets = PartitionCores( args.cores, args.threads, args.verbose )
+
+        if len( coreSets ) < args.cores :
+            print( f'RunDir: cores reduced from {args.cores} to ' +\
+                   f'{len( coreSets )} for {args.threads} threads/worker' )
+            args.cores = len( coreSets )
+
+        coreQueue = Queue()
+        for coreSet in coreSets :
+            coreQueue.put( coreSet )
+
+    with Pool( processes   = args.cores,
+               initializer = InitWorker,
+               initargs    = ( coreQueue, args.threads ) ) as pool:
         pool.starmap( CallGenerate,
                       [ ( args, param ) for param in params ] )
 
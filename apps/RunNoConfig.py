@@ -82,6 +82,12 @@ def ParseCmdLine( argv = None ):
                         default = None,
                         help    = 'Output file.')
 
+    parser.add_argument('-so', '--streamOutput',
+                        dest    = 'streamOutput',
+                        action  = 'store_true',
+                        default = False,
+                        help    = 'Append DataOut rows to .csv each time step.')
+
     parser.add_argument('-r', '--round',
                         dest    = 'round', type = int, 
                         action  = 'store',
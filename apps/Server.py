@@ -0,0 +1,243 @@
+#! /usr/bin/env python3
+
+# Python distribution modules
+from argparse               import ArgumentParser
+from datetime               import datetime
+from multiprocessing        import set_start_method, Pool, Queue
+from multiprocessing        import AuthenticationError
+from multiprocessing.connection import Listener
+from contextlib             import redirect_stderr, redirect_stdout
+from io                     import StringIO
+from os                     import chdir, environ, lstat, remove, umask
+from os.path                import exists
+from stat                   import S_ISSOCK
+from threading              import Thread
+from traceback              import format_exc
+
+# Community modules
+
+# Local modules
+import gmn
+from   gmn.CLI_Parser   import ParseCmdLine as ParseGMNCmdLine
+from   gmn.ConfigParser import ReadConfig
+from   gmn.Auxiliary    import PartitionCores, InitWorker, threadEnvironment
+from   gmn.Auxiliary    import EnableFileCache, ReadDataFrame
+from   gmn.Network      import ReadNetwork
+from   Submit           import AuthKey, authkeyFile
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def main():
+    '''GMN job server. Keep a Pool of warm worker processes with modules,
+       network data and network files loaded, accept GMN jobs on a local
+       Unix socket and return results. See Submit.py for the client.
+
+       A job is the list of Run.py command line arguments and the client
+       working directory. The worker runs GMN Generate() or Forecast()
+       according to the config mode and returns GMN.DataOut.
+
+       Data and network files are read once per worker and reused until
+       the file is modified. -p --preload config files are read when the
+       worker starts.
+
+       Workers use the spawn start method and core pinning of RunDir.py.
+       Plots are not rendered (matplotlib Agg backend).
+
+       Clients authenticate with -k --authkey, else the key of
+       -kf --authkeyFile ( ~/.gmn_authkey ). If the file does not exist
+       a random key is written to it, owner only (0600). The socket is
+       created owner only.
+    '''
+
+    args    = ParseCmdLine()
+    authkey = AuthKey( args.authkey, args.authkeyFile, create = True )
+
+    for variable in threadEnvironment :
+        environ[ variable ] = str( args.threads )
+    # gcc libgomp (kedm) blocks multiprocess.Pool with forked processes
+    set_start_method( "spawn" )
+
+    coreSets  = PartitionCores( args.cores, args.threads, args.verbose )
+    coreQueue = Queue()
+    for coreSet in coreSets :
+        coreQueue.put( coreSet )
+
+    if exists( args.socket ) :
+        if not S_ISSOCK( lstat( args.socket ).st_mode ) :
+            raise RuntimeError( f'--socket {args.socket} exists and is ' +\
+                                'not a socket' )
+        remove( args.socket ) # stale socket from previous server
+
+    with Pool( processes   = len( coreSets ),
+               initializer = InitServerWorker,
+               initargs    = ( coreQueue, args.threads, args.preload,
+                               args.verbose ) ) as pool :
+
+        # Socket is created owner only
+        umask_ = umask( 0o177 )
+        try:
+            listener = Listener( args.socket, family = 'AF_UNIX',
+                                 authkey = authkey )
+        finally :
+            umask( umask_ )
+
+        print( f'GMN Server {datetime.now()} {args.socket} : ' +\
+               f'{len( coreSets )} workers', flush = True )
+
+        try:
+            while True :
+                try:
+                    conn = listener.accept()
+                except AuthenticationError :
+                    print( f'{datetime.now()} client authentication failed',
+                           flush = True )
+                    continue
+
+                # One thread per client : pool runs jobs concurrently
+                Thread( target = HandleClient, args = ( conn, pool, args ),
+                        daemon = True ).start()
+        except KeyboardInterrupt :
+            pass
+        finally :
+            listener.close()
+
+#----------------------------------------------------------------------------
+def HandleClient( conn, pool, args ):
+    '''Receive jobs from conn, run in pool, send results'''
+
+    with conn :
+        while True :
+            try:
+                job = conn.recv()
+            except EOFError :
+                break
+
+            if args.verbose :
+                print( f'{datetime.now()} job: {job[ "argv" ]}', flush = True )
+
+            try:
+                result = pool.apply( RunJob, ( job, ) )
+            except Exception :
+                result = { 'DataOut' : None, 'elapsed' : None,
+                           'error'   : format_exc() }
+
+            conn.send( result )
+
+#----------------------------------------------------------------------------
+def InitServerWorker( coreQueue, threads, preload, verbose ):
+    '''Pool initializer : pin cores, import modules, read preload files'''
+
+    InitWorker( coreQueue, threads )
+
+    # Import modules loaded on first use by gmn
+    import matplotlib
+    matplotlib.use( 'Agg' )
+    import pyEDM
+    gmn.ImportPlot()
+    try:
+        import sklearn.svm, sklearn.neighbors, sklearn.linear_model
+    except ImportError :
+        pass
+
+    EnableFileCache()
+
+    for configFile in preload :
+        args       = ParseGMNCmdLine( [ '-i', configFile ] )
+        parameters = ReadConfig( args )
+        ReadNetwork( parameters.networkFile )
+        ReadDataFrame( parameters.networkData, verbose = verbose )
+
+#----------------------------------------------------------------------------
+def RunJob( job ):
+    '''Run one GMN job in a warm worker.
+       job : { 'argv' : Run.py arguments, 'cwd' : client directory }
+       Returns { 'DataOut' : DataFrame, 'elapsed' : seconds, 'error' : str }
+    '''
+
+    startTime = datetime.now()
+    result    = { 'DataOut' : None, 'elapsed' : None, 'error' : None }
+
+    try:
+        chdir( job[ 'cwd' ] )
+
+        # argparse exits on invalid arguments or -h : report the message
+        messages = StringIO()
+        try:
+            with redirect_stdout( messages ), redirect_stderr( messages ) :
+                args = ParseGMNCmdLine( job[ 'argv' ] )
+        except SystemExit :
+            raise RuntimeError( f'Run.py arguments {job[ "argv" ]}\n' +\
+                                messages.getvalue() )
+
+        parameters = ReadConfig( args )
+
+        G = gmn.GMN( args, parameters )
+
+        if "generate" in parameters.mode.lower() :
+            G.Generate()
+        else :
+            G.Forecast()
+
+        result[ 'DataOut' ] = G.DataOut
+
+    except BaseException : # SystemExit would end the worker
+        result[ 'error' ] = format_exc()
+
+    result[ 'elapsed' ] = ( datetime.now() - startTime ).total_seconds()
+
+    return result
+
+#----------------------------------------------------------------------------
+def ParseCmdLine():
+
+    parser = ArgumentParser( description = 'GMN Server' )
+
+    parser.add_argument('-s', '--socket',
+                        dest    = 'socket', type = str,
+                        action  = 'store',
+                        default = '/tmp/gmn.sock',
+                        help    = 'Unix socket address.')
+
+    parser.add_argument('-k', '--authkey',
+                        dest    = 'authkey', type = str,
+                        action  = 'store',
+                        default = None,
+                        help    = 'Connection authentication key.')
+
+    parser.add_argument('-kf', '--authkeyFile',
+                        dest    = 'authkeyFile', type = str,
+                        action  = 'store',
+                        default = authkeyFile,
+                        help    = 'Authentication key file if no --authkey.')
+
+    parser.add_argument('-c', '--cores',
+                        dest    = 'cores', type = int,
+                        action  = 'store',
+                        default = 4,
+                        help    = 'Worker processes.')
+
+    parser.add_argument('-t', '--threads',
+                        dest    = 'threads', type = int,
+                        action  = 'store',
+                        default = 1,
+                        help    = 'OpenMP/BLAS threads per worker.')
+
+    parser.add_argument('-p', '--preload', nargs = '+',
+                        dest    = 'preload', type = str,
+                        action  = 'store',
+                        default = [],
+                        help    = 'Config files of data & networks to load.')
+
+    parser.add_argument('-v', '--verbose',
+                        dest   = 'verbose',
+                        action = 'store_true', default = False )
+
+    args = parser.parse_args()
+
+    return args
+
+#----------------------------------------------------------------------------
+# Provide for cmd line invocation and clean module loading
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#! /usr/bin/env python3
+
+# Python distribution modules
+from argparse import ArgumentParser
+from datetime import datetime
+from multiprocessing.connection import Client
+from os       import O_CREAT, O_EXCL, O_WRONLY, getcwd, open as os_open, stat
+from os.path  import exists, expanduser
+from secrets  import token_hex
+
+# Default file of the connection authentication key
+authkeyFile = '~/.gmn_authkey'
+
+# Community modules
+
+# Local modules
+
+#----------------------------------------------------------------------------
+#----------------------------------------------------------------------------
+def main():
+    '''Submit GMN jobs to a running Server.py
+
+       Arguments not recognized here are Run.py arguments passed to the
+       server. Each -i config file in --configFiles is a separate job.
+       Paths are relative to the current directory.
+
+       The authentication key is -k --authkey, or read from the
+       -kf --authkeyFile written by Server.py ( ~/.gmn_authkey ).
+
+       Example:
+         ./Server.py -c 8 -p ../config/default.cfg &
+         ./Submit.py -i ../config/default.cfg -o out.csv
+    '''
+
+    startTime = datetime.now()
+
+    args, runArgv = ParseCmdLine()
+
+    results = Submit( args.configFiles, runArgv,
+                      socket = args.socket, authkey = args.authkey,
+                      authkeyFile = args.authkeyFile )
+
+    for configFile, result in zip( args.configFiles, results ) :
+        if result[ 'error' ] :
+            print( f'{configFile} failed:\n{result[ "error" ]}' )
+            continue
+
+        print( f'{configFile} : {result[ "elapsed" ]} s' )
+        if args.verbose :
+            print( result[ 'DataOut' ].tail(), flush = True )
+
+    print( f'Elapsed time {datetime.now() - startTime}' )
+
+#----------------------------------------------------------------------------
+def Submit( configFiles, runArgv = [], socket = '/tmp/gmn.sock',
+            authkey = None, authkeyFile = authkeyFile ):
+    '''Send one job per config file to the Server on socket.
+       Returns list of result dicts { 'DataOut', 'elapsed', 'error' }'''
+
+    results = []
+
+    with Client( socket, family = 'AF_UNIX',
+                 authkey = AuthKey( authkey, authkeyFile ) ) as conn :
+        for configFile in configFiles :
+            conn.send( { 'argv' : [ '-i', configFile ] + runArgv,
+                         'cwd'  : getcwd() } )
+            results.append( conn.recv() )
+
+    return results
+
+#----------------------------------------------------------------------------
+def AuthKey( authkey = None, authkeyFile = authkeyFile, create = False ):
+    '''Connection authentication key : authkey if specified, else read
+       from authkeyFile. If create and authkeyFile does not exist a random
+       key is written to authkeyFile with owner only access (0600).'''
+
+    if authkey :
+        return authkey.encode()
+
+    authkeyFile = expanduser( authkeyFile )
+
+    if create and not exists( authkeyFile ) :
+        with open( os_open( authkeyFile, O_WRONLY | O_CREAT | O_EXCL,
+                            0o600 ), 'w' ) as fob :
+            fob.write( token_hex( 32 ) + '\n' )
+
+    if not exists( authkeyFile ) :
+        raise RuntimeError( f'AuthKey(): no --authkey and no {authkeyFile}' +\
+                            ' : written by Server.py' )
+
+    if stat( authkeyFile ).st_mode & 0o077 :
+        raise RuntimeError( f'AuthKey(): {authkeyFile} must be accessible ' +\
+                            'by owner only (chmod 600)' )
+
+    with open( authkeyFile ) as fob :
+        return fob.read().strip().encode()
+
+#----------------------------------------------------------------------------
+def ParseCmdLine():
+
+    parser = ArgumentParser( description = 'GMN Submit',
+                             allow_abbrev = False )
+
+    parser.add_argument('-i', '--configFiles', nargs = '+',
+                        dest    = 'configFiles', type = str,
+                        action  = 'store',
+                        required = True,
+                        help    = 'Config files, one job each.')
+
+    parser.add_argument('-s', '--socket',
+                        dest    = 'socket', type = str,
+                        action  = 'store',
+                        default = '/tmp/gmn.sock',
+                        help    = 'Server Unix socket address.')
+
+    parser.add_argument('-k', '--authkey',
+                        dest    = 'authkey', type = str,
+                        action  = 'store',
+                        default = None,
+                        help    = 'Connection authentication key.')
+
+    parser.add_argument('-kf', '--authkeyFile',
+                        dest    = 'authkeyFile', type = str,
+                        action  = 'store',
+                        default = authkeyFile,
+                        help    = 'Authentication key file if no --authkey.')
+
+    parser.add_argument('-V', '--Verbose',
+                        dest   = 'verbose',
+                        action = 'store_true', default = False,
+                        help   = 'Print DataOut tail.')
+
+    # Remaining arguments are passed to the server as Run.py arguments
+    args, runArgv = parser.parse_known_args()
+
+    return args, runArgv
+
+#----------------------------------------------------------------------------
+# Provide for cmd line invocation and clean module loading
+#----------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
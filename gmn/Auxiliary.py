@@ -3,14 +3,39 @@ Functions
 1. ReadDataFrame() read pandas DataFrame
 2. TimeExtension() for DataFrame time column. Needs refactor.
 3. TestTimeExtension()
+4. AvailableCores(), CgroupQuota() CPU cores available to this process
+5. PartitionCores() disjoint core sets for Pool workers
+6. InitWorker() Pool initializer: pin worker cores, cap BLAS/OpenMP threads
+7. EnableFileCache(), CachedRead() keep file objects in memory (apps/Server)
 '''
 
 # Python distribution modules
+import os
 from datetime import date, datetime, time
+from math     import ceil
+from os       import cpu_count, environ
+from os.path  import abspath, getmtime
+from queue    import Empty
+
+# Core affinity is Linux only : None on macOS, Windows
+sched_getaffinity = getattr( os, 'sched_getaffinity', None )
+sched_setaffinity = getattr( os, 'sched_setaffinity', None )
 
 # Community modules
 from pandas import DataFrame, Series, read_csv, read_feather, read_pickle
 
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError :
+    threadpool_limits = None # BLAS threads capped by environment only
+
+# In-memory file cache : None is disabled. See EnableFileCache()
+fileCache = None
+
+# Environment variables read by OpenMP / BLAS runtimes when loaded
+threadEnvironment = [ 'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                      'MKL_NUM_THREADS', 'BLIS_NUM_THREADS' ]
+
 #-----------------------------------------------------------
 #-----------------------------------------------------------
 def ReadDataFrame( file, usecols = None, index_col = None, verbose = False ) :
@@ -18,16 +43,20 @@ def ReadDataFrame( file, usecols = None, index_col = None, verbose = False ) :
        File extension can be .csv .feather .gz .xz
     '''
 
-    if '.csv' in file[-4:] :
-        data = read_csv( file, index_col = index_col, usecols = usecols )
-    elif '.feather' in file[-8:] :
-        data = read_feather( file )
-    elif '.gz' in file[-3:] or '.xz' in file[-3:]:
-        data = read_pickle( file )
-    else :
-        errMsg = "ReadDataFrame(): file " + file +\
-            " must be .csv, .feather, .gz, .xz pandas DataFrame"
-        raise RuntimeError( errMsg )
+    def Reader() :
+        if '.csv' in file[-4:] :
+            return read_csv( file, index_col = index_col, usecols = usecols )
+        elif '.feather' in file[-8:] :
+            return read_feather( file )
+        elif '.gz' in file[-3:] or '.xz' in file[-3:]:
+            return read_pickle( file )
+        else :
+            errMsg = "ReadDataFrame(): file " + file +\
+                " must be .csv, .feather, .gz, .xz pandas DataFrame"
+            raise RuntimeError( errMsg )
+
+    key  = ( tuple( usecols ) if usecols is not None else None, index_col )
+    data = CachedRead( file, Reader, key )
 
     if verbose :
         print( f'ReadDataFrame(): {file} : {data.shape}', flush = True )
@@ -207,3 +236,159 @@ def TestTimeExtension( length = 3 ) :
     TimeExtension( ['12','13','14'], length, True )
     TimeExtension( ['1.0','1.1','1.2'], length, True )
     TimeExtension( ['X','Y'], length, True )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def AvailableCores() :
+    '''List of CPU cores available to this process.
+       Cores in the process affinity mask ( all cores if the OS has no
+       affinity ), limited by the CPU quota of the process cgroup.
+    '''
+
+    if sched_getaffinity is not None :
+        cores = sorted( sched_getaffinity( 0 ) )
+    else :
+        cores = list( range( cpu_count() or 1 ) )
+
+    quota = CgroupQuota()
+    if quota is not None :
+        cores = cores[ : max( 1, ceil( quota ) ) ]
+
+    return cores
+
+#-----------------------------------------------------------
+def CgroupQuota() :
+    '''CPU quota ( cores ) of the process cgroup, None if unlimited.
+       The cgroup path is read from /proc/self/cgroup, the smallest
+       quota of the cgroup and its ancestors applies : cgroup v2
+       cpu.max "quota period" or v1 cpu.cfs_quota_us / cfs_period_us.
+    '''
+
+    # /proc/self/cgroup lines : hierarchy-ID:controllers:path
+    v2Path, v1Path = '/', '/'
+    try:
+        with open( '/proc/self/cgroup' ) as f :
+            for line in f :
+                ID, controllers, path = line.rstrip( '\n' ).split( ':', 2 )
+                if ID == '0' and not controllers :
+                    v2Path = path
+                elif 'cpu' in controllers.split( ',' ) :
+                    v1Path = path
+    except ( OSError, ValueError ) :
+        pass
+
+    def Ancestors( path ) :
+        '''path and its parent paths up to the root ''. In a cgroup
+           namespace path is / : the mount is the cgroup itself.'''
+        path = path.rstrip( '/' )
+        while path :
+            yield path
+            path = path[ : path.rfind( '/' ) ]
+        yield ''
+
+    quotas = []
+    for path in Ancestors( v2Path ) :
+        try:
+            # cgroup v2 : "max 100000" or "quota period"
+            with open( f'/sys/fs/cgroup{path}/cpu.max' ) as f :
+                q, period = f.read().split()[:2]
+            if q != 'max' :
+                quotas.append( int( q ) / int( period ) )
+        except ( OSError, ValueError ) :
+            pass
+
+    for mount in [ '/sys/fs/cgroup/cpu', '/sys/fs/cgroup/cpu,cpuacct' ] :
+        for path in Ancestors( v1Path ) :
+            try:
+                # cgroup v1 : quota -1 is unlimited
+                with open( f'{mount}{path}/cpu.cfs_quota_us' ) as f :
+                    q = int( f.read() )
+                with open( f'{mount}{path}/cpu.cfs_period_us' ) as f :
+                    period = int( f.read() )
+                if q > 0 :
+                    quotas.append( q / period )
+            except ( OSError, ValueError ) :
+                pass
+
+    return min( quotas ) if quotas else None
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def PartitionCores( workers, threads = 1, verbose = False ) :
+    '''Partition AvailableCores() into disjoint sets of threads cores,
+       one set per worker. If workers * threads exceeds the available
+       cores the number of sets (workers) is reduced to avoid
+       oversubscription. Returns list of core lists.
+    '''
+
+    cores   = AvailableCores()
+    threads = max( 1, min( threads, len( cores ) ) )
+    workers = max( 1, min( workers, len( cores ) // threads ) )
+
+    coreSets = [ cores[ i * threads : ( i + 1 ) * threads ]
+                 for i in range( workers ) ]
+
+    if verbose :
+        print( f'PartitionCores(): {len( cores )} cores available : ' +\
+               f'{workers} workers x {threads} threads', flush = True )
+
+    return coreSets
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def InitWorker( coreQueue = None, threads = 1 ) :
+    '''multiprocessing Pool initializer.
+       Pin the worker to a core set from coreQueue (see PartitionCores)
+       and cap BLAS/OpenMP threads to threads. Thread variables must
+       also be set in the parent environment before spawning workers
+       since OpenMP (kedm) reads OMP_NUM_THREADS when loaded.
+    '''
+
+    for variable in threadEnvironment :
+        environ[ variable ] = str( threads )
+
+    if coreQueue is not None and sched_setaffinity is not None :
+        try:
+            sched_setaffinity( 0, coreQueue.get( timeout = 1 ) )
+        except Empty :
+            pass # replacement worker : no core set left, not pinned
+
+    if threadpool_limits is not None :
+        threadpool_limits( limits = threads )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def EnableFileCache( enable = True ) :
+    '''Keep objects read with CachedRead() in memory for reuse by
+       later GMN instances in the same process: ReadDataFrame() data
+       and Network files. Used by persistent workers (apps/Server.py).
+       Cached objects are shared and must not be modified in place.
+    '''
+    global fileCache
+    fileCache = {} if enable else None
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def CachedRead( file, reader, key = None, copier = None ) :
+    '''Return reader() or the cached object from a previous call with
+       the same file and key if file has not been modified since.
+       If copier is specified the cached object is passed through
+       copier before it is returned.
+    '''
+
+    if fileCache is None :
+        return reader()
+
+    mtime    = getmtime( file )
+    cacheKey = ( abspath( file ), key ) # relative paths depend on cwd
+
+    if cacheKey in fileCache and fileCache[ cacheKey ][0] == mtime :
+        obj = fileCache[ cacheKey ][1]
+    else :
+        obj = reader()
+        fileCache[ cacheKey ] = ( mtime, obj )
+
+    if copier is not None :
+        obj = copier( obj )
+
+    return obj
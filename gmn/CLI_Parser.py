@@ -25,6 +25,12 @@ def ParseCmdLine( argv = None ):
                         default = None,
                         help    = 'Output file.')
 
+    parser.add_argument('-so', '--streamOutput',
+                        dest    = 'streamOutput',
+                        action  = 'store_true',
+                        default = False,
+                        help    = 'Append DataOut rows to .csv each time step.')
+
     parser.add_argument('-r', '--round',
                         dest    = 'round', type = int, 
                         action  = 'store',
@@ -43,6 +49,18 @@ def ParseCmdLine( argv = None ):
                         default = 2,
                         help    = 'OpenMP threads (kedm).')
 
+    parser.add_argument('-na', '--noAffinity',
+                        dest    = 'noAffinity',
+                        action  = 'store_true',
+                        default = False,
+                        help    = 'Do not pin Pool workers to cores.')
+
+    parser.add_argument('-ra', '--resetAffinity',
+                        dest    = 'resetAffinity',
+                        action  = 'store_true',
+                        default = False,
+                        help    = 'RunDir: reset core affinity to all cores.')
+
     parser.add_argument('-P', '--Plot',
                         dest    = 'Plot',
                         action  = 'store_true',
@@ -45,6 +45,8 @@ def ReadConfig( args, configurationFile = None ):
     param.function         = config[ 'Node' ][ 'function' ]
     param.nodeData         = config[ 'Node' ][ 'data' ]
     param.nodeConfigPath   = config[ 'Node' ][ 'configPath' ]
+    param.boundedHistory   = config.getboolean( 'Node', 'boundedHistory',
+                                                fallback = False )
 
     param.lib              = config [ 'EDM' ][ 'lib'  ]
     param.pred             = config [ 'EDM' ][ 'pred' ]
@@ -0,0 +1,361 @@
+'''
+Batched Simplex cross mapping & CCM : one library column, many targets.
+
+Functions
+1. EmbedColumn() time delay embedding of one column (pyEDM Embed)
+2. LibPredIndices() pyEDM lib_i, pred_i of an embedding
+3. FindNeighbors() knn library neighbors of prediction rows (pyEDM Simplex)
+4. SimplexWeights() Simplex exponential neighbor weights
+5. SimplexProject() weighted average of neighbor targets, all targets
+6. ColumnRho() Pearson rho of each observation : prediction column
+7. CrossMapColumn() rho of column cross mapped to all target columns
+8. CCMColumn() convergent cross map of column to all target columns
+
+The neighbors of a column embedding do not depend on the target : the
+embedding, KDTree and neighbor search are computed once per library
+column and the projection of all targets is a matrix operation.
+Neighbor selection, weights and rho follow pyEDM Simplex & ComputeError
+with tieBreak ordering ( distance, |pred - lib| row, lib row ).
+'''
+
+# Python distribution modules
+
+# Community modules
+from numpy import arange, concatenate, exp, fmax, full, inf, isfinite
+from numpy import intersect1d, lexsort, nan, repeat, round, sqrt, where
+from numpy import take_along_axis, zeros
+from numpy import abs as npabs, sum as npsum
+from numpy.random import default_rng
+from scipy.spatial import KDTree
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def EmbedColumn( x, E, tau = -1 ) :
+    '''Time delay embedding of vector x : N x E array.
+       Column k is x( t + k * tau ), shifted rows are nan.'''
+
+    N         = len( x )
+    embedding = full( ( N, E ), nan )
+
+    for k in range( E ) :
+        shift = k * tau
+        if shift <= 0 :
+            embedding[ -shift :, k ] = x[ : N + shift ]
+        else :
+            embedding[ : N - shift, k ] = x[ shift : ]
+
+    return embedding
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def LibPredIndices( lib, pred, E, tau, Tp, N ) :
+    '''Zero offset library and prediction row indices of pyEDM
+       CreateIndices() for lib, pred lists of 1-offset [start, stop] pairs.
+       Library rows are shifted by the embedding and Tp.'''
+
+    embedShift = abs( tau ) * ( E - 1 )
+    libPairs   = [ ( lib[i],  lib[i+1]  ) for i in range( 0, len( lib ),  2 ) ]
+    predPairs  = [ ( pred[i], pred[i+1] ) for i in range( 0, len( pred ), 2 ) ]
+
+    lib_i = []
+    for r, ( start, stop ) in enumerate( libPairs ) :
+        if tau < 0 :
+            start = start + embedShift
+        else :
+            stop  = stop - embedShift
+
+        if Tp < 0 :
+            start = max( start, start + abs( Tp ) - 1 )
+        elif r == len( libPairs ) - 1 :
+            stop = stop - Tp
+
+        lib_i.append( arange( start - 1, stop ) )
+
+    pred_i = [ arange( start - 1, stop ) for start, stop in predPairs ]
+
+    lib_i  = concatenate( lib_i )
+    pred_i = concatenate( pred_i )
+
+    if len( lib_i ) == 0 or lib_i[-1] >= N or pred_i[-1] >= N :
+        raise RuntimeError( f'LibPredIndices(): lib {lib} pred {pred} ' +\
+                            f'E {E} tau {tau} Tp {Tp} invalid for {N} rows.' )
+
+    return lib_i, pred_i
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def FindNeighbors( embedding, lib_i, pred_i, knn, exclusionRadius = 0 ) :
+    '''knn nearest library neighbors of each prediction row.
+
+       Self matches ( lib and pred overlap ) and library rows within
+       exclusionRadius of the prediction row are excluded. Rows without
+       enough valid neighbors are padded with inf distance.
+
+       Returns knn_neighbors, knn_distances ( N_pred x knn ) sorted by
+       distance. Neighbors are data row indices.'''
+
+    libOverlap = len( intersect1d( lib_i, pred_i ) ) > 0
+
+    exclusion = False
+    if exclusionRadius > 0 :
+        if libOverlap :
+            exclusion = True
+        else :
+            excludeRow = 0
+            if pred_i[0] > lib_i[-1] :
+                excludeRow = pred_i[0] - lib_i[-1]
+            elif lib_i[0] > pred_i[-1] :
+                excludeRow = lib_i[0] - pred_i[-1]
+            exclusion = exclusionRadius >= excludeRow
+
+    nLib = len( lib_i )
+    if exclusion :
+        k_query = min( knn * 5, nLib )
+    elif libOverlap :
+        k_query = knn + 1
+    else :
+        k_query = knn
+    # Lookahead neighbor for tie ordering
+    k_query = min( max( k_query, knn + 1 ), nLib )
+
+    kdTree = KDTree( embedding[ lib_i ], leafsize = 20,
+                     compact_nodes = True, balanced_tree = True )
+
+    distances, neighbors = kdTree.query( embedding[ pred_i ], k = k_query,
+                                         eps = 0, p = 2 )
+    if k_query == 1 :
+        distances = distances[ :, None ]
+        neighbors = neighbors[ :, None ]
+
+    neighbors = lib_i[ neighbors ] # KDTree index to data row
+
+    predRow = pred_i[ :, None ]
+    if exclusion :
+        mask = npabs( predRow - neighbors ) <= exclusionRadius
+    elif libOverlap :
+        mask = predRow == neighbors
+    else :
+        mask = zeros( neighbors.shape, dtype = bool )
+
+    # Order : distance, |pred - lib| row, lib row. Excluded sort last
+    N, k    = neighbors.shape
+    distKey = where( mask, inf, distances )
+    rows    = repeat( arange( N )[ :, None ], k, axis = 1 )
+    proxKey = npabs( predRow - neighbors )
+    order   = lexsort( ( neighbors.ravel(), proxKey.ravel(),
+                         distKey.ravel(), rows.ravel() ) ).reshape( N, k )
+    order   = order[ :, : min( knn, k ) ]
+
+    knn_neighbors = neighbors.ravel()[ order ]
+    knn_distances = distKey.ravel()[ order ]
+
+    # Ties at the query boundary can exclude closer rows in tie order :
+    # scan the full library for those rows
+    if k_query < nLib :
+        maxQuery = where( isfinite( distances ), distances, -inf ).max(axis=1)
+        knnth    = knn_distances[ :, -1 ]
+        flagged  = where( ~isfinite( knnth ) | ( knnth >= maxQuery ) )[0]
+
+        embedLib = embedding[ lib_i ]
+        for i in flagged :
+            p = pred_i[ i ]
+            d = sqrt( npsum( ( embedLib - embedding[ p ] )**2, axis = 1 ) )
+            if exclusion :
+                keep = npabs( p - lib_i ) > exclusionRadius
+            else :
+                keep = lib_i != p
+            libRow, d = lib_i[ keep ], d[ keep ]
+            rowOrder  = lexsort( ( libRow, npabs( p - libRow ), d ) )[ :knn ]
+            t = len( rowOrder )
+            knn_neighbors[ i, :t ] = libRow[ rowOrder ]
+            knn_distances[ i, :t ] = d[ rowOrder ]
+            knn_distances[ i, t: ] = inf
+
+    # Padding slots are inert : nearest neighbor with inf distance
+    pad = ~isfinite( knn_distances )
+    knn_neighbors = where( pad, knn_neighbors[ :, :1 ], knn_neighbors )
+
+    return knn_neighbors, knn_distances
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def SimplexWeights( knn_distances ) :
+    '''Simplex weights exp( -d / dmin ), 0 for inf ( padding ) distance'''
+
+    finite = isfinite( knn_distances )
+
+    minDistances = where( finite, knn_distances, inf ).min( axis = 1 )
+    minDistances = where( isfinite( minDistances ), minDistances, 1. )
+    minDistances = fmax( minDistances, 1E-6 )
+
+    weights = exp( -knn_distances / minDistances[ :, None ] )
+
+    return where( finite, weights, 0. )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def SimplexProject( knn_neighbors, weights, targets, Tp = 0 ) :
+    '''Simplex projection of all targets columns ( N x M ) : N_pred x M
+       Rows without neighbor weight are nan.'''
+
+    projection = zeros( ( knn_neighbors.shape[0], targets.shape[1] ) )
+
+    for k in range( knn_neighbors.shape[1] ) :
+        w = weights[ :, k ]
+        # Zero weight slots can not propagate nan targets
+        projection += where( w[ :, None ] > 0,
+                             w[ :, None ] * targets[ knn_neighbors[:,k] + Tp ],
+                             0. )
+
+    weightRowSum = npsum( weights, axis = 1 )
+    empty        = weightRowSum <= 0
+    projection  /= where( empty, 1., weightRowSum )[ :, None ]
+    projection[ empty ] = nan
+
+    return projection
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def ColumnRho( obs, pred, digits = 6 ) :
+    '''Pearson rho of each column of obs, pred ignoring non finite rows.
+       nan if fewer than 5 rows ( pyEDM ComputeError )'''
+
+    valid = isfinite( obs ) & isfinite( pred )
+    n     = valid.sum( axis = 0 )
+    obs   = where( valid, obs,  0. )
+    pred  = where( valid, pred, 0. )
+
+    nRows = where( n > 0, n, 1 )
+    dObs  = where( valid, obs  - obs.sum ( axis = 0 ) / nRows, 0. )
+    dPred = where( valid, pred - pred.sum( axis = 0 ) / nRows, 0. )
+
+    norm = sqrt( ( dObs**2 ).sum( axis = 0 ) * ( dPred**2 ).sum( axis = 0 ) )
+    rho  = ( dObs * dPred ).sum( axis = 0 ) / where( norm > 0, norm, nan )
+
+    return where( n < 5, nan, round( rho, digits ) )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def CrossMapColumn( x, targets, lib, pred, E, Tp = 0, tau = -1,
+                    exclusionRadius = 0, knn = 0 ) :
+    '''Simplex cross map rho of column x to each column of targets.
+
+       x       : vector of library column values ( N )
+       targets : N x M array of target values
+       lib, pred : 1-offset [start, stop] pairs as in pyEDM
+       knn = 0 : knn = E + 1
+
+       Returns rho vector ( M ).'''
+
+    N = len( x )
+    if knn < 1 :
+        knn = E + 1
+
+    embedding     = EmbedColumn( x, E, tau )
+    lib_i, pred_i = LibPredIndices( lib, pred, E, tau, Tp, N )
+
+    # Remove embedding rows with nan
+    validRow = isfinite( embedding ).all( axis = 1 )
+    lib_i    = lib_i [ validRow[ lib_i  ] ]
+    pred_i   = pred_i[ validRow[ pred_i ] ]
+
+    if len( lib_i ) == 0 or len( pred_i ) == 0 :
+        return full( targets.shape[1], nan )
+
+    knn_neighbors, knn_distances = \
+        FindNeighbors( embedding, lib_i, pred_i, knn, exclusionRadius )
+
+    weights    = SimplexWeights( knn_distances )
+    projection = SimplexProject( knn_neighbors, weights, targets, Tp )
+
+    # Observations at pred row + Tp within the data
+    obsRow = pred_i + Tp
+    inData = ( obsRow >= 0 ) & ( obsRow < N )
+
+    return ColumnRho( targets[ obsRow[ inData ] ], projection[ inData ] )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def CCMColumn( x, targets, E, libSizes, sample, Tp = 0, tau = -1,
+               exclusionRadius = 0, knn = 0, seed = None ) :
+    '''Convergent cross map of column x to each column of targets.
+
+       As pyEDM CCM : at each library size L, sample times, L random
+       rows of the x embedding are the library and all valid rows are
+       predicted. The KDTree and neighbors of a library subsample are
+       shared by all targets. Target nan are dropped from rho.
+
+       x        : vector of library column values ( N )
+       targets  : N x M array of target values
+       libSizes : list of library sizes
+       knn = 0  : knn = E + 1
+
+       Returns ( len( libSizes ) x M ) mean rho of the samples.'''
+
+    N = len( x )
+    if knn < 1 :
+        knn = E + 1
+
+    # Valid rows : finite embedding, target row t + Tp in data
+    embedding = EmbedColumn( x, E, tau )
+    rows      = arange( N )
+    valid     = isfinite( embedding ).all( axis = 1 ) & \
+                ( rows + Tp >= 0 ) & ( rows + Tp < N )
+    valid_i   = rows[ valid ]
+    M         = len( valid_i )
+
+    embedValid = embedding[ valid_i ]
+    targetVals = targets[ valid_i + Tp ]
+    self_i     = arange( M )[ :, None ]
+
+    rng = default_rng( seed )
+    rho = full( ( len( libSizes ), targets.shape[1] ), nan )
+
+    for i, L in enumerate( libSizes ) :
+        L = min( L, M )
+        k = min( knn, L - 1 )
+        if k < 1 :
+            continue
+
+        # Query headroom : self match and exclusionRadius
+        k_query = min( k + 1 + 2 * exclusionRadius, L )
+
+        rhoSample = full( ( sample, targets.shape[1] ), nan )
+
+        for s in range( sample ) :
+            lib_i = rng.choice( M, size = L, replace = False )
+            lib_i.sort()
+
+            kdTree = KDTree( embedValid[ lib_i ] )
+            distances, neighbors = kdTree.query( embedValid, k = k_query )
+            if k_query == 1 :
+                distances = distances[ :, None ]
+                neighbors = neighbors[ :, None ]
+
+            neighbors = lib_i[ neighbors ] # KDTree index to valid row
+
+            mask = neighbors == self_i
+            if exclusionRadius > 0 :
+                mask |= npabs( valid_i[ :, None ] - valid_i[ neighbors ] ) \
+                        <= exclusionRadius
+
+            # First k valid neighbors, rows with fewer are not predicted
+            order     = mask.argsort( axis = 1, kind = 'stable' )[ :, :k ]
+            neighbors = take_along_axis( neighbors, order, axis = 1 )
+            distances = take_along_axis( where( mask, inf, distances ),
+                                         order, axis = 1 )
+
+            weights = SimplexWeights( distances )
+            weights[ ~isfinite( distances[ :, -1 ] ) ] = 0
+
+            projection = SimplexProject( neighbors, weights, targetVals )
+
+            rhoSample[ s ] = ColumnRho( targetVals, projection )
+
+        # Mean of samples ignoring nan
+        finite   = isfinite( rhoSample )
+        nSamples = finite.sum( axis = 0 )
+        rho[ i ] = where( finite, rhoSample, 0 ).sum( axis = 0 ) / \
+                   where( nSamples > 0, nSamples, nan )
+
+    return rho
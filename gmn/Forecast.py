@@ -57,6 +57,8 @@ def Forecast( self ):
     #--------------------------------------------------------------------
     elif self.FunctionType.value == FunctionType.SMap.value :
 
+        from pyEDM import Embed
+
         # SMap multivariate requires embedded = True
         # Embed data to E, tau
         df = Embed( dataFrame = data, E = Parameters.E,
@@ -3,7 +3,7 @@
 from datetime import datetime
 
 # Community modules
-from pandas import DataFrame, concat
+from pandas import DataFrame, concat, read_csv
 
 # Local modules 
 from .Network      import Network
@@ -17,9 +17,6 @@ class GMN:
        ../apps/Run.py is a CLI to instantiate, configure and Run GMN.
     '''
 
-    # import Plot as a GMN class method
-    from .Plot import Plot
-
     #-------------------------------------------------------------------
     def __init__( self,
                   args        = None,  parameters = None,
@@ -65,6 +62,7 @@ class GMN:
         self.Network     = None
         self.DataOut     = None
         self.lastDataOut = None
+        self.streamed    = False       # Generate() DataOut rows in files
 
         if args.DEBUG :
             import faulthandler
@@ -81,6 +79,9 @@ class GMN:
     def Generate( self ):
         '''Execute GMN generative loop for predictionLength steps
            calling the Generate() method of each Network Node. 
+
+           args.streamOutput : the rows of each time step are appended to
+           the .csv output files and are not kept in DataOut.
         '''
 
         if self.args.verbose or self.args.DEBUG :
@@ -89,8 +90,54 @@ class GMN:
 
         # Local References for convenience and readability
         Network = self.Network
+
+        # Time of generated rows : PRESUMED Network data column 1 is time
+        newTime = TimeExtension(
+            Network.data.iloc[ Network.dataLib_i ][ Network.timeColumnName ],
+            self.Parameters.predictionLength )
+
+        # Node outputs of each time step, concatenated to DataOut at end
+        NodeOutputs = []
+
+        # Streamed output : .csv files the rows are appended to
+        streams = []
+        if self.args.streamOutput and self.Parameters.predictionLength :
+            for outFile in self.OutputFiles() :
+                if '.csv' not in outFile[-4:] :
+                    raise RuntimeError( 'GMN.Generate(): streamOutput ' +\
+                                        'requires .csv output ' + outFile )
+            streams = [ open( outFile, 'w' ) for outFile in self.OutputFiles() ]
+
+        self.streamed = len( streams ) > 0
+
+        try :
+            self.GenerateSteps( newTime, NodeOutputs, streams )
+        finally :
+            for stream in streams :
+                stream.close()
+
+        if self.streamed : # DataOut of the last time step
+            self.DataOut = self.Rows( self.lastDataOut, newTime[ -1 : ] )
+        else :
+            self.DataOut = self.Rows( concat( [ self.DataOut, *NodeOutputs ] ),
+                                      newTime )
+
+        if self.args.verbose or self.args.DEBUG :
+            end = datetime.now()
+            print( f'<- GMN:Generate() {end}  :  {end-start}', flush = True )
+
+        self.Output()
+
+    #-------------------------------------------------------------------
+    def GenerateSteps( self, newTime, NodeOutputs, streams ):
+        '''Time loop of Generate(). Node outputs of each time step are
+           appended to NodeOutputs, or written to streams if streamed.'''
+
+        Network = self.Network
         Graph   = self.Network.Graph
 
+        fmt = "%." + str( self.args.round ) + "f"
+
         # Time Loop
         for t_i in range( self.Parameters.predictionLength ):
             if self.args.DEBUG :
@@ -101,6 +148,9 @@ class GMN:
             NodeOutput = DataFrame( columns = self.Network.dataColumns,
                                     dtype = float )
 
+            # Node data changed : embeddings of the previous step are stale
+            Network.embeddings = {}
+
             # Network Loop
             for nodeName in Network.TopologicalSorted :
                 node = Graph.nodes[ nodeName ]['Node']
@@ -115,28 +165,31 @@ class GMN:
 
             # Set lastDataOut to node output for this time step, add to DataOut
             self.lastDataOut = NodeOutput
-            self.DataOut     = concat( [ self.DataOut, NodeOutput ] )
-
-        # if factor != 1 apply
-        if self.Parameters.factor != 1 :
-            self.DataOut = self.DataOut.mul( node.Parameters.factor )
 
-        # Insert time column to DataOut
-        # PRESUMED Network data column 1 is time
-        newTime = TimeExtension(
-            Network.data.iloc[ Network.dataLib_i ][ Network.timeColumnName ],
-            self.Parameters.predictionLength )
+            if streams :
+                rows = self.Rows( NodeOutput, newTime[ t_i : t_i + 1 ] )
+                for stream in streams :
+                    rows.to_csv( stream, header = t_i == 0,
+                                 float_format = fmt, index = False )
+            else :
+                NodeOutputs.append( NodeOutput )
 
-        self.DataOut[ Network.timeColumnName ] = newTime
+    #-------------------------------------------------------------------
+    def Rows( self, NodeOutput, times ):
+        '''DataOut rows of node outputs : factor applied, time column set
+           to times, 0-offset row labels. NodeOutput is not modified.'''
 
-        # Reset DataFrame row labels to default 0-offset integers
-        self.DataOut.reset_index( drop = True, inplace = True )
+        # if factor != 1 apply : factor of the last node of Network Loop
+        if self.Parameters.factor != 1 :
+            node = self.Network.Graph.nodes[
+                self.Network.TopologicalSorted[-1] ]['Node']
+            NodeOutput = NodeOutput.mul( node.Parameters.factor )
 
-        if self.args.verbose or self.args.DEBUG :
-            end = datetime.now()
-            print( f'<- GMN:Generate() {end}  :  {end-start}', flush = True )
+        # Insert time column : PRESUMED Network data column 1 is time
+        rows = NodeOutput.assign( **{ self.Network.timeColumnName : times } )
 
-        self.Output()
+        # Reset DataFrame row labels to default 0-offset integers
+        return rows.reset_index( drop = True )
 
     #-------------------------------------------------------------------
     def Forecast( self ):
@@ -178,36 +231,56 @@ class GMN:
         self.Output()
 
     #-------------------------------------------------------------------
-    def Output( self ):
-        '''Write DataOut file(s). Plot'''
+    def Plot( self ):
+        '''Plot DataOut. See .Plot : matplotlib is imported on first use'''
+        from . import ImportPlot
+        ImportPlot()( self )
 
-        fmt = "%." + str( self.args.round ) + "f"
-        
-        # Write DataOut file(s)
+    #-------------------------------------------------------------------
+    def OutputFiles( self ):
+        '''DataOut files : args.outputFile, outPath/dataOutFile'''
+
+        outFiles = []
         if self.args.outputFile:
-            if '.csv' in self.args.outputFile[-4:] :
-                self.DataOut.to_csv( self.args.outputFile,
-                                     float_format = fmt, index = False )
-            elif '.feather' in self.args.outputFile[-8:] :
-                self.DataOut.to_feather( self.args.outputFile )
-            else :
-                print( 'GMN.Output(): Unrecognized output file format' )
+            outFiles.append( self.args.outputFile )
 
         if len( self.Parameters.dataOutFile ) and \
            not self.Parameters.dataOutFile.isspace():
-            outFile = self.Parameters.outPath + '/' + self.Parameters.dataOutFile
-            if '.csv' in outFile[-4:] :
-                self.DataOut.to_csv( outFile, float_format = fmt, index = False )
-            elif '.feather' in outFile[-8:] :
-                self.DataOut.to_feather( outFile )
-            else :
-                print( 'GMN.Output(): Unrecognized data out file format' )
+            outFiles.append( self.Parameters.outPath + '/' +\
+                             self.Parameters.dataOutFile )
+
+        return outFiles
+
+    #-------------------------------------------------------------------
+    def Output( self ):
+        '''Write DataOut file(s). Plot
+           Generate() streamOutput files are written : DataOut is read
+           from the output file to Plot.'''
+
+        fmt = "%." + str( self.args.round ) + "f"
+
+        plot = self.args.Plot or self.args.StatePlot or \
+               self.Parameters.showPlot or len( self.Parameters.plotFile )
+
+        if self.streamed :
+            if plot :
+                self.DataOut = read_csv( self.OutputFiles()[0] )
+        else :
+            # Write DataOut file(s)
+            for outFile in self.OutputFiles() :
+                if '.csv' in outFile[-4:] :
+                    self.DataOut.to_csv( outFile, float_format = fmt,
+                                         index = False )
+                elif '.feather' in outFile[-8:] :
+                    self.DataOut.to_feather( outFile )
+                else :
+                    print( 'GMN.Output(): Unrecognized output file format',
+                           outFile )
 
         if self.args.DEBUG :
             print( "GMN.Output() DataOut:" )
             print( self.DataOut, flush = True )
 
         # Plot
-        if self.args.Plot or self.args.StatePlot or \
-           self.Parameters.showPlot or len( self.Parameters.plotFile ):
+        if plot :
             self.Plot()
@@ -1,8 +1,10 @@
 
+# Python distribution modules
+from math import dist
+
 # Community modules
 from pandas import concat
 from numpy  import arange
-from pyEDM  import Embed
 
 # Local modules
 from .Common import *
@@ -18,14 +20,34 @@ def Generate( self, lastDataOut ):
         print( self.data.tail( 2 ) );
         print( 'lastDataOut:' ); print( lastDataOut, flush = True )
 
+    # Local References for convenience and readability
+    Parameters = self.Parameters
+
     # Append new data to end of node data : except on time step 0
     # Do not insert via .loc[] : stackoverflow.com/questions/57000903/
-    if not ( lastDataOut is None ):
-        self.data = concat( [ self.data, lastDataOut ] )
+    if self.history is None :
+        if not ( lastDataOut is None ):
+            self.data = concat( [ self.data, lastDataOut ] )
 
-    # Local References for convenience and readability
-    Parameters = self.Parameters
-    data       = self.data
+        data = self.data
+    else :
+        # Bounded history : library + last generated rows of the window
+        libraryRows = self.data.shape[0]
+
+        if not ( lastDataOut is None ):
+            row = libraryRows + self.history
+
+            if row == self.window.shape[0] : # full : shift generated rows
+                row = row - 1
+                self.window.iloc[ libraryRows : row ] = \
+                    self.window.iloc[ libraryRows + 1 : ].to_numpy()
+            else :
+                self.history = self.history + 1
+
+            self.window.iloc[ row ] = \
+                lastDataOut[ self.data.columns ].iloc[ 0 ].to_numpy()
+
+        data = self.window.iloc[ : libraryRows + self.history ]
 
     if self.args.DEBUG :
         print( '  Appended data : shape: ', data.shape );
@@ -71,9 +93,14 @@ def Generate( self, lastDataOut ):
         #     self.Parameters.solver = None
 
         # SMap multivariate requires embedded = True
-        # Embed data to E, tau
-        df = Embed( dataFrame = data, E = Parameters.E,
-                    tau = Parameters.tau, columns = Parameters.columns )
+        # Embed data to E, tau : network embedding cache for network data
+        if self.sharedData :
+            df = self.Network.Embedding( data, Parameters.columns,
+                                         Parameters.E, Parameters.tau )
+        else :
+            from pyEDM import Embed
+            df = Embed( dataFrame = data, E = Parameters.E,
+                        tau = Parameters.tau, columns = Parameters.columns )
 
         # Remove leading NaN from the time shift
         offset = ( Parameters.E - 1 ) * abs( Parameters.tau )
@@ -0,0 +1,158 @@
+'''
+KSG mutual information of data columns with shared marginals.
+
+Functions
+1. PrepareColumns() scale columns, add noise, sort marginals
+2. MarginalCount() points within radius of each point of a sorted marginal
+3. KSG() Kraskov, Stögbauer, Grassberger mutual information of x, y
+4. MutualInfoColumn() MI and MI non linearity of a column to all columns
+
+KSG() is algorithm 1 of Kraskov et al. PHYSICAL REVIEW E 69, 066138 (2004)
+as in sklearn mutual_info_regression : Chebyshev k nearest neighbor
+radius in the joint space, marginal counts within the radius. Columns are
+scaled to unit variance with 1E-10 noise as sklearn. The scaled, sorted
+marginal of each column is computed once in PrepareColumns() and the
+marginal counts are binary searches ( searchsorted ) in sorted columns.
+'''
+
+# Python distribution modules
+
+# Community modules
+from numpy import abs, column_stack, full, inf, linspace, maximum, minimum
+from numpy import nan, nextafter, quantile, searchsorted, sort, where
+from numpy.random import default_rng
+from scipy.spatial import KDTree
+from scipy.special import digamma
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def PrepareColumns( values, rng = None ) :
+    '''Scale columns of values ( N x M ) to unit variance and add 1E-10
+       noise ( sklearn mutual_info_regression ).
+       Returns scaled values and scaled values sorted by column.'''
+
+    if rng is None :
+        rng = default_rng()
+
+    std    = values.std( axis = 0 )
+    scaled = values / where( std > 0, std, 1. )
+
+    means   = maximum( 1, abs( scaled ).mean( axis = 0 ) )
+    scaled += 1E-10 * means * rng.standard_normal( scaled.shape )
+
+    return scaled, sort( scaled, axis = 0 )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def MarginalCount( xSorted, x, radius ) :
+    '''Number of points with | xj - x | <= radius of each x, excluding x.
+       xSorted is x sorted.'''
+
+    N  = len( xSorted )
+    hi = searchsorted( xSorted, x + radius, side = 'right' )
+    lo = searchsorted( xSorted, x - radius, side = 'left'  )
+
+    # x +- radius is rounded : move bounds to the exact | xj - x | <= radius
+    while True :
+        down = ( hi > 0 ) & ( xSorted[ hi - 1 ] - x > radius )
+        up   = ( hi < N ) & ( xSorted[ minimum( hi, N - 1 ) ] - x <= radius )
+        if not ( down.any() or up.any() ) :
+            break
+        hi = hi - down + up
+
+    while True :
+        up   = ( lo < N ) & ( x - xSorted[ minimum( lo, N - 1 ) ] > radius )
+        down = ( lo > 0 ) & ( x - xSorted[ lo - 1 ] <= radius )
+        if not ( down.any() or up.any() ) :
+            break
+        lo = lo - down + up
+
+    return hi - lo - 1
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def KSG( x, y, k = 3, xSorted = None, ySorted = None ) :
+    '''KSG mutual information of scaled vectors x, y in nats, >= 0.
+       xSorted, ySorted : sorted x, y if precomputed.'''
+
+    if xSorted is None : xSorted = sort( x )
+    if ySorted is None : ySorted = sort( y )
+
+    N  = len( x )
+    xy = column_stack( ( x, y ) )
+
+    # k-th neighbor in the joint space, first neighbor is the point
+    distances, _ = KDTree( xy ).query( xy, k = k + 1, p = inf )
+    radius       = nextafter( distances[ :, -1 ], 0 )
+
+    nx = MarginalCount( xSorted, x, radius )
+    ny = MarginalCount( ySorted, y, radius )
+
+    mi = digamma( N ) + digamma( k ) - \
+         digamma( nx + 1 ).mean() - digamma( ny + 1 ).mean()
+
+    return max( 0, mi )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def MutualInfoColumn( col, values, scaled, sortedValues, k = 3,
+                      nonLinear = False, columns = None, rng = None ) :
+    '''Mutual information of column col of values ( N x M ) to all
+       columns. If nonLinear, also the MI non linearity : MI of column and
+       the target with linear dependence removed, relative to MI.
+       Stat (2015), 4: 291-303, Reginald Smith  DOI: 10.1002/sta4.96
+
+       scaled, sortedValues from PrepareColumns( values ).
+       columns : column indices for MI and non linearity, default all.
+                 KSG MI is symmetric, all pairs need only columns > col.
+       Returns MI vector ( M ), non linearity vector ( M ) or None.
+       The col element and elements not computed are nan.'''
+
+    if rng is None :
+        rng = default_rng()
+
+    N, M    = values.shape
+    x       = scaled[ :, col ]
+    xSorted = sortedValues[ :, col ]
+
+    if columns is None :
+        columns = range( M )
+
+    MI = full( M, nan )
+    for j in columns :
+        if j == col :
+            continue
+        MI[ j ] = KSG( x, scaled[ :, j ], k, xSorted, sortedValues[ :, j ] )
+
+    if not nonLinear :
+        return MI, None
+
+    # Least squares residuals of all targets given column
+    xRaw  = values[ :, col ]
+    xMean = xRaw.mean()
+    yMean = values.mean( axis = 0 )
+    slope = ( xRaw - xMean ) @ ( values - yMean ) / \
+            ( ( xRaw - xMean ) @ ( xRaw - xMean ) )
+    residuals = values - yMean - ( xRaw - xMean )[ :, None ] * slope
+
+    NL = full( M, nan )
+    for j in columns :
+        if j == col :
+            continue
+
+        # Map residual CDF onto the target CDF ( van der Waerden )
+        y      = values[ :, j ]
+        zVals  = linspace( y.min(), y.max(), N )
+        zProb  = searchsorted( sort( residuals[ :, j ] ), zVals,
+                               side = 'right' ) / N
+        yPrime, yPrimeSorted = PrepareColumns( quantile( y, zProb ), rng )
+
+        MIp = KSG( x, yPrime, k, xSorted, yPrimeSorted )
+
+        if MIp > MI[ j ] :
+            MIp = 0 # Invalid model... set for 0 NonLinear
+
+        if MI[ j ] > 0 :
+            NL[ j ] = MIp / MI[ j ]
+
+    return MI, NL
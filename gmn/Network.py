@@ -1,13 +1,18 @@
 
 # Python distribution modules
-import pickle
+import json, pickle
+from   concurrent.futures import ThreadPoolExecutor
+from   pathlib            import Path
 
 # Community modules
-from networkx import topological_sort
+# networkx is imported to read or plot networkx DiGraph networks only
+from numpy  import array, full, load, nan, savez, vstack
+from pandas import DataFrame
 
 # Local modules 
-from .Node      import Node
-from .Auxiliary import ReadDataFrame
+from .Node         import Node
+from .Auxiliary    import ReadDataFrame, CachedRead
+from .ConfigParser import ReadConfig
 
 #---------------------------------------------------------------
 #---------------------------------------------------------------
@@ -15,7 +20,8 @@ class Network:
     '''
     Network object instantiated from GMN.__init__. Stored in GMN.Network.
 
-    Reads networkx DiGraph file from CreateNetwork.py
+    Reads network file from CreateNetwork.py : pickled networkx DiGraph,
+    .npz or .json. .npz and .json are read into a NetworkGraph.
 
     Loads Network data if Parameters.networkData specified. This is default
     data for Nodes. Node will override data if a node configuration file
@@ -36,37 +42,47 @@ class Network:
         self.data              = None # All input data subset to dataColumns
         self.dataColumns       = None # time + TopologicalSorted nodes
         self.dataLib_i         = None # indices to subset data "library"
+        self.dataLibrary       = None # data[ dataLib_i ] : shared by Nodes
+        self.dataPosition      = None # { column : dataLibrary column index }
+        self.nodeConfigs       = None # { node : node.cfg Parameters }
+        self.embeddings        = {}   # { ( column, E, tau, rows ) : lags }
+        self.libraryEmbeddings = {}   # { ( column, E, tau ) : library lags }
         self.timeColumnName    = None
 
         # Read network graph : See CreateNetwork.py
-        graphFile = parameters.networkFile
-        with open( graphFile, 'rb' ) as f :
-            NetworkGraphDict = pickle.load( f )
-            self.Graph       = NetworkGraphDict[ 'Graph' ]
-            self.NetworkMap  = NetworkGraphDict[ 'Map'   ] # Not used
+        NetworkGraphDict = ReadNetwork( parameters.networkFile )
+        self.Graph       = NetworkGraphDict[ 'Graph' ]
+        self.NetworkMap  = NetworkGraphDict[ 'Map'   ] # Not used
 
-            if args.DEBUG :
-                print( '-> Network.__init__()', flush = True )
-                self.Parameters.Print()
-
-                print( 'Graph.nodes : ---------------------' )
-                print( self.Graph.nodes, flush = True )
-                print( 'NetworkMap : ----------------------' )
-                print( self.NetworkMap, flush = True )
-
-                if args.Plot :
-                    import matplotlib.pyplot as plt
-                    from   networkx import draw, shell_layout
-                    plt.figure()
-                    draw( self.Graph,
-                          pos = shell_layout( self.Graph ),
-                          node_size = 30, with_labels = True,
-                          font_size = 14, font_weight = 'bold', alpha = 0.5 )
-                    plt.show()
+        if args.DEBUG :
+            print( '-> Network.__init__()', flush = True )
+            self.Parameters.Print()
+
+            print( 'Graph.nodes : ---------------------' )
+            print( self.Graph.nodes, flush = True )
+            print( 'NetworkMap : ----------------------' )
+            print( self.NetworkMap, flush = True )
+
+            if args.Plot :
+                import matplotlib.pyplot as plt
+                from   networkx import draw, shell_layout
+                graph = self.Graph
+                if isinstance( graph, NetworkGraph ) :
+                    graph = graph.ToDiGraph()
+                plt.figure()
+                draw( graph,
+                      pos = shell_layout( graph ),
+                      node_size = 30, with_labels = True,
+                      font_size = 14, font_weight = 'bold', alpha = 0.5 )
+                plt.show()
 
         # Sort for execution order : target node last
         # Note: topological_sort() returns a generator, store in list for reuse
-        self.TopologicalSorted = list( topological_sort( self.Graph ) )
+        if isinstance( self.Graph, NetworkGraph ) :
+            self.TopologicalSorted = list( self.Graph.topologicalOrder )
+        else :
+            from networkx import topological_sort
+            self.TopologicalSorted = list( topological_sort( self.Graph ) )
 
         # Load Network data as Pandas DataFrame
         if parameters.networkData and not parameters.networkData.isspace() :
@@ -98,6 +114,14 @@ class Network:
         self.dataColumns = [self.timeColumnName] + self.TopologicalSorted
         self.data = self.data.loc[:, self.dataColumns]
 
+        # Node data library : nodes select their columns of the rows
+        self.dataLibrary  = self.data.loc[ self.dataLib_i ]
+        self.dataPosition = { column : i for i, column in
+                              enumerate( self.dataLibrary.columns ) }
+
+        # Node config files found in nodeConfigPath
+        self.nodeConfigs = ReadNodeConfigs( args, parameters, self.Graph )
+
         # Instantiate Node objects. Store in self.Graph.nodes[ nodeName ]
         #   networkx.org/documentation/stable/reference/classes/digraph.html#
         for nodeName in self.Graph :
@@ -115,3 +139,248 @@ class Network:
                 errMsg = "Network.__init__(): Node" + node.name +\
                          " has no data."
                 raise RuntimeError( errMsg )
+
+    #-------------------------------------------------------------
+    def LibraryData( self, columns ):
+        '''DataFrame of columns of dataLibrary'''
+        return self.dataLibrary.take( [ self.dataPosition[ column ]
+                                        for column in columns ], axis = 1 )
+
+    #-------------------------------------------------------------
+    def Embedding( self, data, columns, E, tau ):
+        '''pyEDM Embed( data, E, tau, columns ) from the embedding cache.
+           The lagged block of ( column, E, tau ) is computed once for the
+           data rows of a time step and shared by nodes of network data.
+           GMN.Generate() clears embeddings at each time step.
+           data rows begin with dataLibrary : for tau < 0 the library rows
+           are LibraryEmbedding(), only generated rows are lagged.'''
+
+        libraryRows = len( self.dataLib_i )
+
+        blocks = []
+        for column in columns :
+            key = ( column, E, tau, data.shape[0] )
+            if key not in self.embeddings :
+                x = data[ column ].to_numpy( dtype = float )
+
+                if tau < 0 and len( x ) >= libraryRows :
+                    # Lags of generated rows reach span rows into library
+                    span  = min( ( E - 1 ) * abs( tau ), libraryRows )
+                    lags  = LagColumn( x[ libraryRows - span : ], E, tau )
+                    block = vstack( ( self.LibraryEmbedding( column, E, tau ),
+                                      lags[ span : ] ) )
+                else :
+                    block = LagColumn( x, E, tau )
+
+                self.embeddings[ key ] = block
+            blocks.append( self.embeddings[ key ] )
+
+        # Embed() column names and order : x(t-0), y(t-0), x(t-1)...
+        sign = '-' if tau < 0 else '+'
+        return DataFrame( { f'{column}(t{sign}{lag * abs( tau )})' :
+                            block[ :, lag ] for lag in range( E )
+                            for column, block in zip( columns, blocks ) },
+                          index = data.index )
+
+    #-------------------------------------------------------------
+    def LibraryEmbedding( self, column, E, tau ):
+        '''LagColumn() of column of dataLibrary, computed once per run'''
+
+        key = ( column, E, tau )
+        if key not in self.libraryEmbeddings :
+            x = self.dataLibrary[ column ].to_numpy( dtype = float )
+            self.libraryEmbeddings[ key ] = LagColumn( x, E, tau )
+
+        return self.libraryEmbeddings[ key ]
+
+#---------------------------------------------------------------
+#---------------------------------------------------------------
+def LagColumn( x, E, tau ):
+    '''Time delay embedding of vector x : ( len( x ), E ) array of x
+       shifted by 0, tau, ... ( E - 1 ) tau. Shifted rows are nan.'''
+
+    N     = len( x )
+    block = full( ( N, E ), nan )
+
+    for lag in range( E ) :
+        shift = min( lag * abs( tau ), N )
+        if tau < 0 :
+            block[ shift :, lag ] = x[ : N - shift ]
+        else :
+            block[ : N - shift, lag ] = x[ shift : ]
+
+    return block
+
+#---------------------------------------------------------------
+#---------------------------------------------------------------
+class NetworkGraph:
+    '''
+    Directed graph of a network read from a .npz or .json network file.
+    Provides the networkx DiGraph interface used by GMN : iteration over
+    nodes, nodes[ name ] attribute dicts, predecessors(), successors()
+    and edges, with the topological order from the file.
+    ToDiGraph() returns a networkx DiGraph.
+    '''
+
+    def __init__( self, names, edges, topologicalOrder ):
+        '''names : node names, edges : ( source, target ) names in
+           predecessor order, topologicalOrder : node names'''
+        self.nodes            = { name : {} for name in names }
+        self.edges            = list( edges )
+        self.topologicalOrder = list( topologicalOrder )
+        self.pred             = dict.fromkeys( self.nodes, () )
+        self.succ             = None # successors() on first use
+
+        for source, target in self.edges :
+            if self.pred[ target ] :
+                self.pred[ target ].append( source )
+            else :
+                self.pred[ target ] = [ source ]
+
+    def __iter__( self ) :
+        return iter( self.nodes )
+
+    def __len__( self ) :
+        return len( self.nodes )
+
+    def __contains__( self, name ) :
+        return name in self.nodes
+
+    def predecessors( self, name ) :
+        return iter( self.pred[ name ] )
+
+    def successors( self, name ) :
+        if self.succ is None :
+            self.succ = {}
+            for source, target in self.edges :
+                self.succ.setdefault( source, [] ).append( target )
+        return iter( self.succ.get( name, () ) )
+
+    def copy( self ) :
+        '''New graph with the same nodes and edges, empty node attributes'''
+        return NetworkGraph( self.nodes, self.edges, self.topologicalOrder )
+
+    def ToDiGraph( self ) :
+        '''networkx DiGraph with the same nodes, edges & node attributes'''
+        from networkx import DiGraph
+
+        graph = DiGraph()
+        graph.add_nodes_from( self.nodes.items() )
+        graph.add_edges_from( self.edges )
+        return graph
+
+#---------------------------------------------------------------
+#---------------------------------------------------------------
+def ReadNetwork( networkFile ):
+    '''Read network file from CreateNetwork.py
+       Return dict { 'Graph' : networkx DiGraph, 'Map' : { node : [drivers] } }
+
+       .npz  : WriteNetwork() names, source, target, topological arrays
+       .json : networkx node_link_data with topological_ordering
+       Both are read into a NetworkGraph, networkx is not imported.
+       Other files are a pickled dict.
+
+       If the file cache is enabled (Auxiliary.EnableFileCache) the Graph
+       is copied since Network assigns Node objects to Graph.nodes.
+    '''
+
+    def Reader() :
+        if networkFile.endswith( '.npz' ) :
+            with load( networkFile ) as npz :
+                names = npz[ 'names' ].tolist()
+                edges = zip( [ names[i] for i in npz[ 'source' ].tolist() ],
+                             [ names[i] for i in npz[ 'target' ].tolist() ] )
+                order = [ names[i] for i in npz[ 'topological' ].tolist() ]
+            graph = NetworkGraph( names, edges, order )
+
+        elif networkFile.endswith( '.json' ) :
+            with open( networkFile ) as f :
+                obj = json.load( f )
+            links = obj[ 'edges' ] if 'edges' in obj else obj[ 'links' ]
+            graph = NetworkGraph( [ node[ 'id' ] for node in obj[ 'nodes' ] ],
+                                  [ ( link[ 'source' ], link[ 'target' ] )
+                                    for link in links ],
+                                  obj[ 'topological_ordering' ] )
+        else :
+            with open( networkFile, 'rb' ) as f :
+                return pickle.load( f )
+
+        return { 'Graph' : graph, 'Map' : graph.pred }
+
+    def Copier( D ) :
+        return { 'Graph' : D[ 'Graph' ].copy(), 'Map' : D[ 'Map' ] }
+
+    return CachedRead( networkFile, Reader, copier = Copier )
+
+#---------------------------------------------------------------
+#---------------------------------------------------------------
+def ReadNodeConfigs( args, parameters, nodes, threads = 16 ):
+    '''{ node : Parameters } of node config files nodeConfigPath +
+       node + .cfg. The config directory is listed once, config files
+       are read by a pool of threads.'''
+
+    if not parameters.nodeConfigPath :
+        return {}
+
+    # Use pathlib.Path() class object for OS independence
+    configFiles = { str( x ) for x in
+                    Path( parameters.nodeConfigPath ).glob( '*.cfg' ) }
+
+    nodeFiles = {}
+    for node in nodes :
+        nodeFile = Path( parameters.nodeConfigPath + node + '.cfg' )
+        if str( nodeFile ) in configFiles :
+            nodeFiles[ node ] = nodeFile
+
+    if args.DEBUG :
+        print( 'ReadNodeConfigs()', len( nodeFiles ), 'of',
+               len( configFiles ), 'config files', flush = True )
+
+    with ThreadPoolExecutor( max_workers = threads ) as exe :
+        configs = exe.map( lambda nodeFile : ReadConfig( args, nodeFile ),
+                           nodeFiles.values() )
+
+        return dict( zip( nodeFiles, configs ) )
+
+#---------------------------------------------------------------
+#---------------------------------------------------------------
+def ReadNetworkNodes( networkFile ):
+    '''List of node names of a CreateNetwork.py network file.
+       .npz : only the names array is read, no edges or graph
+       .json : node ids of node_link_data
+       Other files are a pickled dict, the Graph is unpickled.'''
+
+    if networkFile.endswith( '.npz' ) :
+        with load( networkFile ) as npz :
+            return npz[ 'names' ].tolist()
+
+    if networkFile.endswith( '.json' ) :
+        with open( networkFile ) as f :
+            return [ node[ 'id' ] for node in json.load( f )[ 'nodes' ] ]
+
+    with open( networkFile, 'rb' ) as f :
+        return list( pickle.load( f )[ 'Graph' ].nodes )
+
+#---------------------------------------------------------------
+#---------------------------------------------------------------
+def WriteNetwork( networkFile, graph ):
+    '''Write networkx DiGraph or NetworkGraph graph to .npz networkFile :
+       names, source, target ( edge node indices in predecessor order ),
+       topological ( node indices in topological order )'''
+
+    if isinstance( graph, NetworkGraph ) :
+        order = graph.topologicalOrder
+    else :
+        from networkx import topological_sort
+        order = list( topological_sort( graph ) )
+
+    names = list( graph )
+    index = { name : i for i, name in enumerate( names ) }
+    edges = [ ( index[ source ], index[ target ] ) for target in names
+              for source in graph.predecessors( target ) ]
+
+    savez( networkFile,
+           names       = array( names, dtype = str ),
+           source      = array( [ e[0] for e in edges ], dtype = 'int32' ),
+           target      = array( [ e[1] for e in edges ], dtype = 'int32' ),
+           topological = array( [ index[ n ] for n in order ], dtype = 'int32' ) )
@@ -1,29 +1,14 @@
 
 # Python distribution modules
 from copy    import copy
-from pathlib import Path
+from os      import environ
 
 # Community modules
-from pyEDM import Simplex, SMap, Embed
-
-try:
-    from math                 import dist
-    from sklearn              import neighbors
-    from sklearn.svm          import SVR
-    from sklearn.linear_model import LinearRegression
-except ImportError as err:
-    print( err, "Node: SVR, knn, Linear not available", flush = True )
-
-try:
-    from os import environ
-    environ[ 'OMP_PROC_BIND' ] = 'false' # Kokkos warning OpenMP
-    from kedm import simplex as kedm_simplex
-    from kedm import smap    as kedm_smap
-except ImportError as err:
-    print( err, "Node: kedm not loaded", flush = True )
+# pyEDM, sklearn and kedm are imported on first use by a Node function
+from numpy  import nan
+from pandas import DataFrame, concat
 
 # Local modules 
-from .ConfigParser import ReadConfig
 from .Common       import *
 from .Auxiliary    import ReadDataFrame
 
@@ -34,9 +19,10 @@ class Node:
     A node in the network. Each node has its own data and Parameters.  
 
     By default, the node is initialized with a copy() of Network.Parameters
-    and Network.data.
+    and its columns of Network.dataLibrary.
 
-    If a Parameter node.cfg file is found: read Parameters and data from it.
+    If a Parameter node.cfg file is found: Parameters and data from it.
+    Node config files are read by Network ( ReadNodeConfigs ).
 
     Network output at the end of each timestep is appended to the node data. 
     Thus all nodes share generated data, but can be initialized with 
@@ -45,13 +31,18 @@ class Node:
     Note the data "library" is limited to Parameters.predictionStart. It 
     does not grow as generated values are added to node data.
 
+    If Parameters.boundedHistory is True, Simplex, kedmSimplex and kedmSMap
+    nodes with default lib & pred keep the library in data and only the
+    last E * |tau| + Tp generated rows in a preallocated window. Node memory
+    is then constant over predictionLength.
+
     Generate() method performs prediction. Called from GMN Generate() in the
     Network Node loop to dispatch the specified FunctionType and return a 
     single prediction value collected across all nodes in GMN.lastDataOut.
     '''
 
     # import Generate, Forecast as a Node class method
-    from .Generate import Generate
+    from .Generate import Generate, FindNextX
     from .Forecast import Forecast
 
     #----------------------------------------------------------------------
@@ -65,30 +56,22 @@ class Node:
         self.FunctionType = None  # Enumeration
         self.data         = None  # input data (copy or read) + generated
         self.libEnd_i     = None  # EDM library end: Constant @ predictionStart
+        self.history      = None  # generated rows in window : boundedHistory
+        self.window       = None  # library + generated rows : boundedHistory
+        self.sharedData   = False # data from Network : Network.Embedding()
 
         if args.DEBUG :
             print( '-> Node.__init__() : ', nodeName, flush = True )
 
         # Set nodeParameters = True if node config file found
-        nodeParameters = False
-
-        if self.Network.Parameters.nodeConfigPath :
-            # Use pathlib.Path() class object for OS independence 
-            nodePath = Path( self.Network.Parameters.nodeConfigPath )
-            nodeFile = Path( self.Network.Parameters.nodeConfigPath + \
-                             nodeName + '.cfg' )
-
-            queryGen = nodePath.glob( '*.cfg' ) # Path.glob returns generator
-            query    = [ str( x ) for x in queryGen ]
+        nodeParameters = nodeName in self.Network.nodeConfigs
 
-            if str( nodeFile ) in query :
-                nodeParameters = True
+        if nodeParameters : # Found node.cfg : config Parameters
+            self.Parameters = self.Network.nodeConfigs[ nodeName ]
 
-                if args.DEBUG :
-                    print( str( nodeFile ) + " Found in ", query, flush = True )
-
-        if nodeParameters : # Found node.cfg : Get config Parameters
-            self.Parameters = ReadConfig( args, nodeFile )
+            if args.DEBUG :
+                print( nodeName + ".cfg Found in ",
+                       self.Network.Parameters.nodeConfigPath, flush = True )
         else : # default to Network config
             self.Parameters = copy( self.Network.Parameters )
 
@@ -124,18 +107,20 @@ class Node:
                 self.data = data.loc[ self.Network.dataLib_i,
                                        nodeDataCols ].copy()
             else :
-                self.data = Network.data.loc[ self.Network.dataLib_i,
-                                              nodeDataCols ].copy()
+                self.data       = Network.LibraryData( nodeDataCols )
+                self.sharedData = True
         else :
-            # No Node data specified. Make copy of network data
-            # subset to dataLib_i = range( parameters.predictionStart )
-            self.data = Network.data.loc[ self.Network.dataLib_i,
-                                          nodeDataCols ].copy()
+            # No Node data specified. Columns of network data library
+            # dataLib_i = range( parameters.predictionStart ). Node data
+            # is replaced, not modified in place ( Generate : concat )
+            self.data       = Network.LibraryData( nodeDataCols )
+            self.sharedData = True
 
         # Assign node FunctionType and Function
         nodeFunction = self.Parameters.function.lower()
 
         if "simplex" == nodeFunction :
+            from pyEDM import Simplex
             self.FunctionType = FunctionType.Simplex
             self.Function     = Simplex
 
@@ -143,6 +128,7 @@ class Node:
             self.libEnd_i = self.data.shape[0]
 
         elif "smap" == nodeFunction :
+            from pyEDM import SMap
             self.FunctionType = FunctionType.SMap
             self.Function     = SMap
 
@@ -153,36 +139,78 @@ class Node:
 
         elif "kedmsimplex" == nodeFunction or "kedm_simplex" == nodeFunction:
             self.FunctionType = FunctionType.kedmSimplex
-            self.Function     = kedm_simplex
+            self.Function     = ImportKedm().simplex
 
             # EDM lib index based on input data (subset to predictionStart)
             self.libEnd_i = self.data.shape[0]
 
         elif "kedmsmap" == nodeFunction or "kedm_smap" == nodeFunction:
             self.FunctionType = FunctionType.kedmSMap
-            self.Function     = kedm_smap
+            self.Function     = ImportKedm().smap
 
             # EDM lib index based on input data (subset to predictionStart)
             self.libEnd_i = self.data.shape[0]
 
         elif "linear" == nodeFunction :
+            from sklearn.linear_model import LinearRegression
             self.FunctionType = FunctionType.Linear
             self.Function     = LinearRegression
 
         elif "svr" == nodeFunction :
+            from sklearn.svm import SVR
             self.FunctionType = FunctionType.SVR
             self.Function     = SVR
 
         elif "knn" == nodeFunction :
+            from sklearn.neighbors import KNeighborsRegressor
             self.FunctionType = FunctionType.knn
-            self.Function     = neighbors.KNeighborsRegressor
+            self.Function     = KNeighborsRegressor
 
         else :
             raise RuntimeError( "Node(): " + nodeName +\
                                 " Invalid node function: " + nodeFunction )
 
+        # Bounded history : library in data, last generated rows in history
+        # Only for functions reading the fixed library and the last rows
+        if self.Parameters.boundedHistory and \
+           self.FunctionType in [ FunctionType.Simplex,
+                                  FunctionType.kedmSimplex,
+                                  FunctionType.kedmSMap ] :
+
+            if len( self.Parameters.lib.strip() )  or \
+               len( self.Parameters.pred.strip() ) or \
+               len( self.Parameters.validLib )     or \
+               self.Parameters.generateSteps :
+                raise RuntimeError( "Node(): " + nodeName + " boundedHistory"+\
+                    " requires default lib, pred, validLib, generateSteps" )
+
+            historyLength = self.Parameters.E * abs( self.Parameters.tau ) +\
+                            self.Parameters.Tp
+
+            # Preallocated window : library rows then historyLength rows of
+            # generated values, written in place by Generate()
+            self.window  = concat( [ self.data,
+                                     DataFrame( nan, index = range( historyLength ),
+                                                columns = self.data.columns ) ],
+                                   ignore_index = True )
+            self.history = 0
+
         if args.DEBUG :
             print( 'columns:', self.Parameters.columns )
             print( 'target:',  self.Parameters.target  )
             print( str( self.FunctionType ), str( self.Function ) ) 
             print( '<- Node.__init__() : ', nodeName, flush = True )
+
+#-----------------------------------------------------------
+#-----------------------------------------------------------
+def ImportKedm():
+    '''Import kedm on first use by a kedm node function'''
+
+    environ[ 'OMP_PROC_BIND' ] = 'false' # Kokkos warning OpenMP
+
+    try:
+        import kedm
+    except ImportError as err:
+        raise RuntimeError( f"Node: kedm not available: {err}" )
+
+    return kedm
@@ -36,6 +36,7 @@ class Parameters:
         self.function         = None
         self.nodeData         = None
         self.nodeConfigPath   = None
+        self.boundedHistory   = None
 
         # EDM
         self.lib              = None
@@ -88,6 +89,7 @@ class Parameters:
         print( '\t', 'nodeInfo',    self.nodeInfo )
         print( '\t', 'nodeData',    self.nodeData )
         print( '\t', 'function',    self.function )
+        print( '\t', 'boundedHistory', self.boundedHistory )
 
         # EDM
         print( '\t', 'lib',             self.lib   )
@@ -9,7 +9,20 @@ from .ConfigParser import *
 from .Network      import *
 from .Node         import *
 from .Parameters   import *
-from .Plot         import *
+
+# Plot (matplotlib) is imported on first use
+def __getattr__( name ):
+    if name == 'Plot' :
+        return ImportPlot()
+    raise AttributeError( f"module 'gmn' has no attribute '{name}'" )
+
+def ImportPlot():
+    '''Import .Plot, return the Plot function. The first import of the
+       .Plot submodule binds gmn.Plot to the module : rebind gmn.Plot to
+       the function. gmn code imports .Plot through ImportPlot() only.'''
+    from .Plot import Plot
+    globals()[ 'Plot' ] = Plot
+    return Plot
 
 __version__     = "1.5.0"
 __versionDate__ = "2025-11-15"
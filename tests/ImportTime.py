@@ -0,0 +1,65 @@
+#! /usr/bin/env python3
+
+# Python distribution modules
+from argparse   import ArgumentParser
+from statistics import median
+import subprocess, sys
+
+'''
+Import time benchmark : python -X importtime -c "import gmn"
+
+   ./ImportTime.py -n 5 -t 15
+
+Reports the median cumulative import time of gmn over -n runs, the
+slowest -t modules of the last run and heavy modules that should be
+loaded on first use only (matplotlib, sklearn, pyEDM, kedm).
+'''
+
+heavyModules = [ 'matplotlib', 'sklearn', 'pyEDM', 'kedm', 'scipy' ]
+
+#----------------------------------------------------------------
+def ImportTime( module = 'gmn' ):
+    '''Run python -X importtime -c "import module" in a new process.
+       Return { module name : ( self us, cumulative us ) }'''
+
+    proc = subprocess.run( [ sys.executable, '-X', 'importtime', '-c',
+                             f'import {module}' ],
+                           capture_output = True, text = True, check = True )
+
+    times = {}
+    for line in proc.stderr.splitlines() :
+        if not line.startswith( 'import time:' ) or 'cumulative' in line :
+            continue
+        selfTime, cumulative, name = line[ len( 'import time:' ): ].split('|')
+        times[ name.strip() ] = ( int( selfTime ), int( cumulative ) )
+
+    return times
+
+#----------------------------------------------------------------
+def main():
+    parser = ArgumentParser( description = 'gmn import time' )
+    parser.add_argument( '-n', '--runs', dest = 'runs', type = int,
+                         default = 5, help = 'Number of runs.' )
+    parser.add_argument( '-t', '--top', dest = 'top', type = int,
+                         default = 15, help = 'Number of slowest modules.' )
+    args = parser.parse_args()
+
+    totals = []
+    for run in range( args.runs ) :
+        times = ImportTime( 'gmn' )
+        totals.append( times[ 'gmn' ][1] )
+
+    print( f'import gmn : median {median( totals ) / 1E6:.3f} s ' +\
+           f'over {args.runs} runs' )
+
+    print( f'Slowest {args.top} modules (cumulative s) :' )
+    slowest = sorted( times.items(), key = lambda x : x[1][1], reverse = True )
+    for name, ( selfTime, cumulative ) in slowest[ : args.top ] :
+        print( f'  {cumulative / 1E6:8.3f}  {name}' )
+
+    loaded = [ m for m in heavyModules if m in times ]
+    print( f'Heavy modules loaded by import gmn : {loaded}' )
+
+#----------------------------------------------------------------
+if __name__ == '__main__':
+    main()
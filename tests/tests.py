@@ -1,10 +1,16 @@
 
 import gmn
-import unittest
+import subprocess, sys, unittest
+from os       import environ, pathsep, stat
+from multiprocessing import AuthenticationError
+from os.path  import abspath, exists, join
+from tempfile import TemporaryDirectory
 # import pkg_resources # Get data file names from GMN package
 
 from pandas import read_csv
 
+from ImportTime import ImportTime, heavyModules
+
 '''
 CLI applications in gmn/apps : How to test here?
 
@@ -96,6 +102,164 @@ class test_GMN( unittest.TestCase ):
  
         self.assertTrue( df.equals( GMN.DataOut.round(4) ) )
 
+    #------------------------------------------------------------
+    # Network : node config files
+    #------------------------------------------------------------
+    def test_read_node_configs( self ):
+        '''ReadNodeConfigs() equals ReadConfig() of each node config file
+           in the test config directory'''
+
+        from os.path     import isfile
+        from gmn.Network import ReadNodeConfigs
+
+        args = gmn.CLI_Parser.ParseCmdLine( [] )
+        parameters = gmn.ConfigParser.ReadConfig( args,
+                                                  'gmn_test_readNode.cfg' )
+        configPath = parameters.nodeConfigPath # ../tests/
+
+        # A, gmn_test1 have config files, B, Out do not
+        nodes = [ 'A', 'B', 'Out', 'gmn_test1' ]
+
+        expected = { node : vars( gmn.ConfigParser.ReadConfig(
+                         args, configPath + node + '.cfg' ) )
+                     for node in nodes
+                     if isfile( configPath + node + '.cfg' ) }
+        self.assertEqual( list( expected ), [ 'A', 'gmn_test1' ] )
+
+        for threads in [ 1, 4 ] :
+            configs = ReadNodeConfigs( args, parameters, nodes,
+                                       threads = threads )
+            self.assertEqual( { node : vars( P )
+                                for node, P in configs.items() }, expected )
+
+        parameters.nodeConfigPath = ''
+        self.assertEqual( ReadNodeConfigs( args, parameters, nodes ), {} )
+
+    #------------------------------------------------------------
+    # GMN Generate : bounded node history
+    #------------------------------------------------------------
+    def test_bounded_history( self ):
+        '''Simplex nodes with library + last E|tau|+Tp rows'''
+
+        args = gmn.CLI_Parser.ParseCmdLine( argv = [] )
+        args.configFile = 'gmn_test1.cfg'
+        parameters = gmn.ConfigParser.ReadConfig( args )
+        parameters.boundedHistory = True
+
+        GMN = gmn.GMN( args, parameters )
+
+        GMN.Generate() # Run GMN forward in time
+
+        for nodeName in GMN.Network.Graph :
+            node = GMN.Network.Graph.nodes[ nodeName ]['Node']
+            self.assertEqual( node.data.shape[0],
+                              parameters.predictionStart )
+            self.assertEqual( node.history, 7 * 3 + 1 )
+            self.assertEqual( node.window.shape[0],
+                              parameters.predictionStart + 7 * 3 + 1 )
+
+        df = self.Files[ "DataOut_ABCD_CMI_E7_tau-3.csv" ]
+
+        self.assertTrue( df.equals( GMN.DataOut.round(4) ) )
+
+    #------------------------------------------------------------
+    # GMN Generate : DataOut rows streamed to the output file
+    #------------------------------------------------------------
+    def test_stream_output( self ):
+        '''--streamOutput file equals the DataOut file'''
+
+        outFiles = []
+        with TemporaryDirectory() as tmpDir :
+            for argv in [ [], [ '-so' ] ] :
+                outFiles.append( join( tmpDir, f'DataOut{len( argv )}.csv' ) )
+
+                args = gmn.CLI_Parser.ParseCmdLine(
+                    argv = [ '-o', outFiles[-1], *argv ] )
+                args.configFile = 'gmn_test1.cfg'
+                parameters = gmn.ConfigParser.ReadConfig( args )
+                parameters.predictionLength = 10
+
+                GMN = gmn.GMN( args, parameters )
+                GMN.Generate()
+
+            self.assertEqual( GMN.DataOut.shape[0], 1 ) # last time step
+            self.assertTrue( read_csv( outFiles[0] ).equals(
+                             read_csv( outFiles[1] ) ) )
+
+    #------------------------------------------------------------
+    # Compact .npz network
+    #------------------------------------------------------------
+    def test_network_npz( self ):
+        '''Network from WriteNetwork() .npz equals the pickled network'''
+
+        from tempfile import TemporaryDirectory
+
+        args = gmn.CLI_Parser.ParseCmdLine( argv = [] )
+        args.configFile = 'gmn_test1.cfg'
+        parameters = gmn.ConfigParser.ReadConfig( args )
+
+        D = gmn.ReadNetwork( parameters.networkFile )
+
+        with TemporaryDirectory() as tmpDir :
+            parameters.networkFile = tmpDir + '/Network.npz'
+            gmn.WriteNetwork( parameters.networkFile, D['Graph'] )
+
+            GMN = gmn.GMN( args, parameters )
+
+        self.assertIsInstance( GMN.Network.Graph, gmn.NetworkGraph )
+        self.assertEqual( { node : list( drivers ) for node, drivers in
+                            GMN.Network.NetworkMap.items() },
+                          { node : list( D['Graph'].predecessors( node ) )
+                            for node in D['Graph'] } )
+
+        GMN.Generate() # Run GMN forward in time
+
+        df = self.Files[ "DataOut_ABCD_CMI_E7_tau-3.csv" ]
+
+        self.assertTrue( df.equals( GMN.DataOut.round(4) ) )
+
+    #------------------------------------------------------------
+    # Network embedding cache
+    #------------------------------------------------------------
+    def test_embedding_cache( self ):
+        '''Network.Embedding() equals pyEDM Embed()'''
+
+        from pyEDM import Embed
+
+        GMN  = gmn.GMN( configFile = 'gmn_test1.cfg' )
+        data = GMN.Network.data
+
+        for E, tau, columns in [ ( 7, -3, ['A', 'B', 'Out'] ),
+                                 ( 2,  1, ['C'] ) ] :
+            df = GMN.Network.Embedding( data, columns, E, tau )
+
+            self.assertTrue( df.equals( Embed( dataFrame = data, E = E,
+                                               tau = tau, columns = columns )))
+
+        self.assertIn( ( 'A', 7, -3, data.shape[0] ), GMN.Network.embeddings )
+
+    #------------------------------------------------------------
+    def test_library_embedding( self ):
+        '''Library lags computed once, generated rows equal pyEDM Embed()'''
+
+        from pandas import concat
+        from pyEDM  import Embed
+
+        GMN     = gmn.GMN( configFile = 'gmn_test1.cfg' )
+        Network = GMN.Network
+        columns = [ 'A', 'B', 'Out' ]
+
+        for rows in [ 0, 1, 20 ] : # generated rows appended to the library
+            data = concat( [ Network.data, Network.data.iloc[ :rows ] ],
+                           ignore_index = True )
+            Network.embeddings = {}
+            df = Network.Embedding( data, columns, 5, -2 )
+
+            self.assertTrue( df.equals( Embed( dataFrame = data, E = 5,
+                                               tau = -2, columns = columns )))
+
+        self.assertEqual( len( Network.libraryEmbeddings ), len( columns ) )
+
     #------------------------------------------------------------
     # GMN Forecast :
     #------------------------------------------------------------
@@ -114,6 +278,755 @@ class test_GMN( unittest.TestCase ):
 
         self.assertTrue( df.equals( GMN.DataOut.round(4).iloc[:,1:5] ) )
 
+    #------------------------------------------------------------
+    # gmn.Plot function
+    #------------------------------------------------------------
+    def test_plot( self ):
+        '''gmn.Plot is the Plot function after GMN.Plot()'''
+
+        import matplotlib
+        matplotlib.use( 'Agg' )
+
+        # As a new process : .Plot submodule not imported
+        sys.modules.pop( 'gmn.Plot', None )
+        vars( gmn ).pop( 'Plot', None )
+
+        args = gmn.CLI_Parser.ParseCmdLine( argv = [] )
+        args.configFile = 'gmn_test1.cfg'
+        parameters = gmn.ConfigParser.ReadConfig( args )
+        parameters.predictionLength = 10
+
+        GMN = gmn.GMN( args, parameters )
+        GMN.Generate()
+
+        with TemporaryDirectory() as tmpDir :
+            GMN.args.PlotFile = join( tmpDir, 'GMN.png' )
+            GMN.Plot()
+
+            self.assertTrue( callable( gmn.Plot ) )
+            gmn.Plot( GMN )
+
+            self.assertTrue( exists( GMN.args.PlotFile ) )
+
+    #------------------------------------------------------------
+    # Core partition for Pool workers
+    #------------------------------------------------------------
+    def test_partition_cores( self ):
+        '''Disjoint core sets of threads cores, no oversubscription'''
+
+        cores    = gmn.Auxiliary.AvailableCores()
+        coreSets = gmn.Auxiliary.PartitionCores( 2 * len( cores ), 1 )
+
+        self.assertEqual( len( coreSets ), len( cores ) )
+        self.assertEqual( sorted( sum( coreSets, [] ) ), cores )
+
+        coreSets = gmn.Auxiliary.PartitionCores( 4, 2 * len( cores ) )
+
+        self.assertEqual( coreSets, [ cores ] )
+
+    #------------------------------------------------------------
+    def test_cgroup_quota( self ):
+        '''CgroupQuota() of a nested cgroup v2, cores without affinity'''
+
+        from io            import StringIO
+        from unittest.mock import patch
+
+        files = { '/proc/self/cgroup' : '0::/outer/inner\n',
+                  '/sys/fs/cgroup/outer/inner/cpu.max' : 'max 100000\n',
+                  '/sys/fs/cgroup/outer/cpu.max' : '250000 100000\n',
+                  '/sys/fs/cgroup/cpu.max' : '800000 100000\n' }
+
+        def Open( fileName, *args, **kwargs ) :
+            if fileName not in files :
+                raise FileNotFoundError( fileName )
+            return StringIO( files[ fileName ] )
+
+        with patch( 'gmn.Auxiliary.open', Open, create = True ), \
+             patch( 'gmn.Auxiliary.sched_getaffinity', None ), \
+             patch( 'gmn.Auxiliary.cpu_count', lambda : 8 ) :
+            self.assertEqual( gmn.Auxiliary.CgroupQuota(), 2.5 )
+            self.assertEqual( gmn.Auxiliary.AvailableCores(), [ 0, 1, 2 ] )
+
+            del files[ '/sys/fs/cgroup/outer/cpu.max' ]
+            del files[ '/sys/fs/cgroup/cpu.max' ]
+            self.assertIsNone( gmn.Auxiliary.CgroupQuota() )
+            self.assertEqual( gmn.Auxiliary.AvailableCores(), list( range( 8 ) ) )
+
+    #------------------------------------------------------------
+    # Lazy imports
+    #------------------------------------------------------------
+    def test_lazy_import( self ):
+        '''import gmn does not load plotting, EDM or sklearn backends'''
+
+        times = ImportTime( 'gmn' )
+
+        self.assertIn( 'gmn', times )
+        self.assertEqual( [ m for m in heavyModules if m in times ], [] )
+
+    #------------------------------------------------------------
+    # Batched cross map
+    #------------------------------------------------------------
+    def test_cross_map( self ):
+        '''CrossMapColumn() rho equals pyEDM Simplex cross map rho'''
+
+        from pyEDM import Simplex, ComputeError
+        from gmn.CrossMap import CrossMapColumn
+
+        data    = read_csv( '../data/TestData_ABCD.csv' )
+        columns = data.columns[ 1: ]
+        lib     = [ 1, data.shape[0] ]
+
+        rho = CrossMapColumn( data[ 'A' ].values, data[ columns ].values,
+                              lib = lib, pred = lib, E = 3, Tp = 1 )
+
+        for target, rho_ in zip( columns, rho ) :
+            S = Simplex( dataFrame = data, columns = 'A', target = target,
+                         lib = lib, pred = lib, E = 3, Tp = 1 )
+            err = ComputeError( S['Observations'].values,
+                                S['Predictions'].values )
+            self.assertEqual( rho_, err['rho'] )
+
+    #------------------------------------------------------------
+    def test_ccm( self ):
+        '''CCMColumn() rho equals pyEDM CCM rho : full library exactly,
+           subsampled libraries within the sampling error'''
+
+        from pyEDM import CCM
+        from gmn.CrossMap import CCMColumn
+
+        data    = read_csv( '../data/TestData_ABCD.csv' )
+        targets = [ 'Out', 'B' ]
+
+        for E, Tp, exclusionRadius in [ ( 3, 0, 0 ), ( 4, 1, 5 ) ] :
+            libMax   = data.shape[0] - ( E - 1 ) - Tp
+            libSizes = [ 50, 200, libMax ]
+
+            rho = CCMColumn( data[ 'A' ].values, data[ targets ].values,
+                             E = E, libSizes = libSizes, sample = 100,
+                             Tp = Tp, exclusionRadius = exclusionRadius,
+                             seed = 1 )
+
+            for j, target in enumerate( targets ) :
+                C = CCM( dataFrame = data, columns = 'A', target = target,
+                         E = E, Tp = Tp, libSizes = libSizes, sample = 100,
+                         exclusionRadius = exclusionRadius, seed = 2 )
+                rho_ = C[ f'A:{target}' ].values
+
+                self.assertAlmostEqual( rho[ -1, j ], rho_[ -1 ], places = 5 )
+                for i in range( len( libSizes ) - 1 ) :
+                    self.assertAlmostEqual( rho[ i, j ], rho_[ i ],
+                                            delta = 0.03 )
+
+    #------------------------------------------------------------
+    # KSG mutual information
+    #------------------------------------------------------------
+    def test_mutual_info( self ):
+        '''MutualInfoColumn() MI equals sklearn mutual_info_regression'''
+
+        from sklearn.feature_selection import mutual_info_regression
+        from gmn.MutualInfo import PrepareColumns, MutualInfoColumn
+
+        data   = read_csv( '../data/TestData_ABCD.csv' )
+        values = data[ [ 'C', 'D', 'Out' ] ].values
+
+        scaled, sortedValues = PrepareColumns( values )
+        MI, NL = MutualInfoColumn( 0, values, scaled, sortedValues, k = 3 )
+
+        for j in [ 1, 2 ] :
+            MI_ = mutual_info_regression( values[ :, [0] ], values[ :, j ],
+                                          n_neighbors = 3, random_state = 0 )
+            self.assertAlmostEqual( MI[ j ], MI_[0], places = 2 ) # noise
+
+#----------------------------------------------------------------
+# CLI applications in gmn/apps
+#----------------------------------------------------------------
+class test_apps( unittest.TestCase ):
+
+    #------------------------------------------------------------
+    @classmethod
+    def setUpClass( self ):
+        self.appsDir  = abspath( '../apps' )
+        self.dataFile = abspath( '../data/TestData_ABCD.csv' )
+        self.env      = dict( environ, PYTHONPATH =
+                              pathsep.join( [ abspath( '..' ), self.appsDir ] ) )
+
+        if self.appsDir not in sys.path :
+            sys.path.insert( 0, self.appsDir )
+
+        self.Files = { 'DataOut_ABCD_CMI_E7_tau-3.csv' :
+                       read_csv( 'DataOut_ABCD_CMI_E7_tau-3.csv' ) }
+
+    #------------------------------------------------------------
+    def RunApp( self, app, *argv, cwd = None ):
+        '''Run apps/app.py with argv in cwd. Returns CompletedProcess'''
+        return subprocess.run( [ sys.executable,
+                                 join( self.appsDir, app + '.py' ), *argv ],
+                               cwd = cwd, env = self.env,
+                               capture_output = True, text = True )
+
+    #------------------------------------------------------------
+    def NetworkMap( self, matrixFile, numDrivers ):
+        '''CreateNetwork() Map of target Out : { node : [ drivers ] }'''
+
+        from CreateNetwork import CreateNetwork
+
+        Network = CreateNetwork( None, interactionMatrixFile = matrixFile,
+                                 targetCols = [ 'Out' ],
+                                 numDrivers = numDrivers )
+
+        return { node : list( drivers )
+                 for node, drivers in Network['Map'].items() }
+
+    #------------------------------------------------------------
+    # CreateNetwork incremental topological order
+    #------------------------------------------------------------
+    def test_add_edge_acyclic( self ):
+        '''AddEdgeAcyclic() rejects cycles as networkx, keeps the order'''
+
+        from random   import Random
+        from networkx import DiGraph, is_directed_acyclic_graph
+        from CreateNetwork import AddEdgeAcyclic
+
+        rng = Random( 0 )
+        for trial in range( 300 ) :
+            graph, order = DiGraph(), {}
+            numNodes     = rng.randint( 2, 12 )
+
+            for edge in range( 3 * numNodes ) :
+                u, v = rng.sample( range( numNodes ), 2 )
+
+                expected = graph.copy()
+                expected.add_edge( u, v )
+                acyclic = is_directed_acyclic_graph( expected )
+
+                self.assertEqual( AddEdgeAcyclic( graph, order, u, v ),
+                                  acyclic )
+                self.assertEqual( graph.has_edge( u, v ), acyclic )
+                if acyclic :
+                    self.assertEqual( set( graph.edges ),
+                                      set( expected.edges ) )
+
+                # order is a topological order : indices 0..-(n-1)
+                self.assertEqual( sorted( order.values() ),
+                                  list( range( 1 - len( order ), 1 ) ) )
+                for a, b in graph.edges :
+                    self.assertLess( order[ a ], order[ b ] )
+
+    #------------------------------------------------------------
+    def test_add_edge_acyclic_chain( self ):
+        '''StreamNetwork of a driver chain : new drivers need no search'''
+
+        from networkx import DiGraph
+        from CreateNetwork import StreamNetwork
+
+        class CountGraph( DiGraph ):
+            '''DiGraph counting successors(), predecessors() calls'''
+            visits = 0
+            def successors( self, n ):
+                CountGraph.visits += 1
+                return super().successors( n )
+            def predecessors( self, n ):
+                CountGraph.visits += 1
+                return super().predecessors( n )
+
+        numNodes = 20000
+        network  = StreamNetwork( [ 0 ] )
+        network.graph = CountGraph()
+
+        # node i is driven by i + 1 and i + 2 : i + 1 -> i is a new node
+        self.assertTrue( network.Discover( lambda node :
+            [ n for n in ( node + 1, node + 2 ) if n < numNodes ] ) )
+
+        self.assertEqual( network.graph.number_of_edges(), 2 * numNodes - 3 )
+        self.assertLess( CountGraph.visits, 4 * numNodes )
+
+    #------------------------------------------------------------
+    def RandomMatrix( self, N, seed = 0 ):
+        '''NxN interaction matrix DataFrame of random values in [-1, 1]'''
+
+        from numpy.random import default_rng
+        from pandas import DataFrame
+
+        labels = [ f'V{i}' for i in range( N ) ]
+        return DataFrame( default_rng( seed ).uniform( -1, 1, ( N, N ) ),
+                          index = labels, columns = labels )
+
+    #------------------------------------------------------------
+    def NetworkFiles( self, fileA, fileB ):
+        '''Assert CreateNetwork output files fileA and fileB are equal'''
+
+        import json, pickle
+        from numpy import load
+
+        if fileA.endswith( '.json' ) :
+            with open( fileA ) as a, open( fileB ) as b :
+                self.assertEqual( json.load( a ), json.load( b ) )
+        elif fileA.endswith( '.npz' ) :
+            with load( fileA ) as a, load( fileB ) as b :
+                self.assertEqual( sorted( a.files ), sorted( b.files ) )
+                for key in a.files :
+                    self.assertTrue( ( a[ key ] == b[ key ] ).all(), key )
+        else :
+            with open( fileA, 'rb' ) as a, open( fileB, 'rb' ) as b :
+                A, B = pickle.load( a ), pickle.load( b )
+            self.assertEqual( A[ 'Map' ], B[ 'Map' ] )
+            self.assertEqual( list( A[ 'Graph' ].edges ),
+                              list( B[ 'Graph' ].edges ) )
+
+    #------------------------------------------------------------
+    # CreateNetworks batch
+    #------------------------------------------------------------
+    def test_create_networks( self ):
+        '''CreateNetworks() batch equals separate CreateNetwork() calls'''
+
+        from pandas import DataFrame
+        from CreateNetwork import CreateNetwork, CreateNetworks
+
+        iMatrix = self.RandomMatrix( 30 )
+
+        with TemporaryDirectory() as tmpDir :
+            driversFile = join( tmpDir, 'drivers.csv' )
+            DataFrame( { 'column' : [ 'V0', 'V5', 'V7' ],
+                         'E'      : [ 5, 1, 0 ] } ).to_csv( driversFile,
+                                                            index = False )
+
+            networks = [
+                { 'targetCols' : [ 'V0' ], 'numDrivers' : 2 },
+                { 'targetCols' : [ 'V0', 'V9' ], 'numDrivers' : 3,
+                  'threshold' : 0.2 },
+                { 'targetCols' : 'V3', 'numDrivers' : 1, 'cmi' : True,
+                  'threshold' : -0.5 },
+                { 'targetCols' : [ 'V1' ], 'numDrivers' : 2,
+                  'driversFile' : driversFile },
+                { 'targetCols' : [ 'V2' ], 'numDrivers' : 4 } ]
+            for i, network in enumerate( networks ) :
+                network[ 'outputFile' ] = \
+                    join( tmpDir, f'batch{i}' + [ '.pkl', '.json', '.npz' ][ i % 3 ] )
+
+            Networks = CreateNetworks( networks, iMatrix.copy(), cores = 2 )
+
+            for network, Network in zip( networks, Networks ) :
+                outputFile = network[ 'outputFile' ].replace( 'batch', 'single' )
+                Single = CreateNetwork( iMatrix.copy(), **dict( network,
+                                        outputFile = outputFile ) )
+
+                self.assertEqual( Network[ 'Map' ], Single[ 'Map' ] )
+                self.assertEqual( list( Network[ 'Graph' ].edges ),
+                                  list( Single[ 'Graph' ].edges ) )
+                self.NetworkFiles( network[ 'outputFile' ], outputFile )
+
+            # Networks are not trivial : drivers of drivers are linked
+            for Network in Networks :
+                self.assertGreater( len( Network[ 'Graph' ] ), 5 )
+
+    #------------------------------------------------------------
+    # CreateNetwork interaction matrix file formats
+    #------------------------------------------------------------
+    def test_matrix_formats( self ):
+        '''Dense and edge list .csv .feather .parquet give one network'''
+
+        from numpy import nan
+        from pandas import DataFrame
+        from CreateNetwork import CreateNetwork
+
+        try:
+            import pyarrow
+            formats = [ 'csv', 'feather', 'parquet' ]
+        except ImportError :
+            formats = [ 'csv' ] # feather, parquet require pyarrow
+
+        iMatrix = self.RandomMatrix( 30, seed = 1 )
+        iMatrix[ iMatrix < -0.5 ] = nan # sparse : missing edges
+
+        # Edge list : source drives target, rows are driven nodes
+        edges = iMatrix.stack().reset_index()
+        edges.columns = [ 'target', 'source', 'weight' ]
+        edges = edges[ edges[ 'target' ] != edges[ 'source' ] ]
+        edges = edges[ [ 'source', 'target', 'weight' ] ]
+
+        # ( targetCols, numDrivers, threshold ) networks
+        cases = [ ( [ 'V0' ], 2, 0 ), ( [ 'V7', 'V3' ], 3, 0.3 ) ]
+
+        def Networks( matrix, matrixFile = None ):
+            return [ CreateNetwork( matrix, interactionMatrixFile = matrixFile,
+                                    targetCols = targets, numDrivers = k,
+                                    threshold = threshold )[ 'Map' ]
+                     for targets, k, threshold in cases ]
+
+        expected = Networks( iMatrix.copy() )
+        self.assertGreater( len( expected[0] ), 5 )
+
+        with TemporaryDirectory() as tmpDir :
+            for fmt in formats :
+                dense = join( tmpDir, f'dense.{fmt}' )
+                edge  = join( tmpDir, f'edges.{fmt}' )
+
+                if fmt == 'csv' :
+                    iMatrix.to_csv( dense )
+                    edges.to_csv( edge, index = False )
+                elif fmt == 'feather' :
+                    iMatrix.reset_index().to_feather( dense )
+                    edges.reset_index( drop = True ).to_feather( edge )
+                else :
+                    iMatrix.to_parquet( dense )
+                    edges.to_parquet( edge, index = False )
+
+                for matrixFile in [ dense, edge ] :
+                    self.assertEqual( Networks( None, matrixFile ), expected,
+                                      matrixFile )
+
+    #------------------------------------------------------------
+    # InteractionMatrix -rho
+    #------------------------------------------------------------
+    def test_correlation_matrix( self ):
+        '''CorrelationMatrix() equals numpy corrcoef, nan and constant
+           columns are nan as corrcoef of the column pairs'''
+
+        from warnings import catch_warnings, simplefilter
+        from numpy import corrcoef, empty, isnan, nan
+        from numpy.testing import assert_allclose
+        from InteractionMatrix import CorrelationMatrix
+
+        values = read_csv( self.dataFile ).iloc[ :, 1: ].to_numpy( dtype = float )
+        values[ :, 1 ]  = values[ :, 0 ] * 2 # exactly correlated : 1
+        values[ 10, 2 ] = nan
+        values[ :, 3 ]  = 3.5               # constant
+
+        with catch_warnings() :
+            simplefilter( 'ignore' ) # corrcoef of nan, constant columns
+            expected = corrcoef( values, rowvar = False )
+            for i in range( values.shape[1] ) :
+                for j in range( values.shape[1] ) :
+                    self.assertEqual( isnan( expected[ i, j ] ), isnan(
+                        corrcoef( values[ :, i ], values[ :, j ] )[ 0, 1 ] ) )
+
+        for block in [ 2048, 2 ] :
+            out = empty( ( values.shape[1], values.shape[1] ) )
+            CC  = CorrelationMatrix( values, block = block, out = out )
+
+            self.assertIs( CC, out )
+            assert_allclose( CC, expected, rtol = 0, atol = 1e-12,
+                             equal_nan = True )
+            self.assertTrue( isnan( CC[ 2 ] ).all() and isnan( CC[ 3 ] ).all() )
+            self.assertAlmostEqual( CC[ 0, 1 ], 1 )
+
+    #------------------------------------------------------------
+    # InteractionMatrix -smap
+    #------------------------------------------------------------
+    def test_smap_theta( self ):
+        '''SMapFunc() tasks per ( cell, theta ) reduced by SMapCells() in
+           any order equal a serial PredictNonlinear() of each cell'''
+
+        from random import Random
+        from types  import SimpleNamespace
+        from pyEDM  import PredictNonlinear
+        from InteractionMatrix import (SMapFunc, SMapCells, SMapNonLinear,
+                                       defaultTheta)
+
+        data  = read_csv( self.dataFile )
+        cells = [ ( 1, 5 ), ( 5, 1 ), ( 3, 4 ) ] # A:Out Out:A C:D
+
+        for theta in [ [ 0.01, 1, 4 ], [] ] :
+            args = SimpleNamespace( E = 3, Tp = 1, tau = -1,
+                                    lib = [ 1, 300 ], pred = [ 301, 400 ],
+                                    theta = theta, exclusionRadius = 0,
+                                    minRho = 0.2, deltaSMap = 0,
+                                    verbose = False )
+            thetas = theta if len( theta ) else defaultTheta
+
+            tasks = [ ( col, target, i ) for col, target in cells
+                      for i in range( len( thetas ) ) ]
+            Random( 0 ).shuffle( tasks )
+
+            smapRho, flat, spectra = {}, {}, {}
+            for task in tasks :
+                D = SMapFunc( task, data = data, args = args )
+                spectra.setdefault( ( D['column'], D['target'] ),
+                                    {} )[ D['theta'] ] = D['rho']
+                for _, column, target, nonLinear in \
+                    SMapCells( D, smapRho, len( thetas ), args ) :
+                    flat[ ( column, target ) ] = nonLinear
+
+            self.assertEqual( smapRho, {} )
+            self.assertEqual( len( flat ), len( cells ) )
+
+            for col, target in cells :
+                column, target = data.columns[ col ], data.columns[ target ]
+                rho = PredictNonlinear( dataFrame = data, columns = column,
+                                        target = target,
+                                        lib = args.lib, pred = args.pred,
+                                        theta = thetas, E = args.E,
+                                        Tp = args.Tp, tau = args.tau,
+                                        exclusionRadius = 0, embedded = False,
+                                        numProcess = 1,
+                                        showPlot = False )[ 'rho' ]
+
+                self.assertEqual( len( rho ), len( thetas ) )
+                for i in range( len( thetas ) ) :
+                    self.assertAlmostEqual( spectra[ ( column, target ) ][ i ],
+                                            rho[ i ], places = 5 )
+                self.assertAlmostEqual( flat[ ( column, target ) ],
+                                        SMapNonLinear( list( rho ), args ),
+                                        places = 10 )
+
+    #------------------------------------------------------------
+    # InteractionMatrix lazy imports
+    #------------------------------------------------------------
+    def test_interaction_import( self ):
+        '''import InteractionMatrix does not load scipy, EDM or sklearn'''
+
+        proc = subprocess.run( [ sys.executable, '-c',
+                                 'import sys, InteractionMatrix; '
+                                 'print( *sys.modules )' ],
+                               env = self.env, capture_output = True,
+                               text = True, check = True )
+        modules = proc.stdout.split()
+
+        self.assertIn( 'InteractionMatrix', modules )
+        self.assertEqual( [ m for m in heavyModules + [ 'gmn.CrossMap',
+                                                        'gmn.MutualInfo' ]
+                            if m in modules ], [] )
+
+    #------------------------------------------------------------
+    # InteractionMatrix --network
+    #------------------------------------------------------------
+    def test_stream_network( self ):
+        '''Streamed --network file equals CreateNetwork of the matrix'''
+
+        from CreateNetwork import CreateNetwork
+
+        with TemporaryDirectory() as tmpDir :
+            for batch, numDrivers, ext in [ ( [ '-b' ], 2, '.json' ),
+                                            ( [],       3, '.pkl' ),
+                                            ( [ '-b' ], 1, '.npz' ) ] :
+                streamFile = join( tmpDir, f'stream{ext}' )
+                singleFile = join( tmpDir, f'single{ext}' )
+                matrix     = join( tmpDir, f'M{len( batch )}' )
+
+                # Network only : no matrices, the pool stops when complete
+                proc = self.RunApp( 'InteractionMatrix', '-d', self.dataFile,
+                                    *batch, '-cmap', '-nm', 'CrossMap',
+                                    '-ns', streamFile, '-nt', 'Out',
+                                    '-nd', str( numDrivers ), '-cr', '1',
+                                    cwd = tmpDir )
+                self.assertEqual( proc.returncode, 0, proc.stderr )
+
+                proc = self.RunApp( 'InteractionMatrix', '-d', self.dataFile,
+                                    *batch, '-cmap', '-om', matrix, '-cr', '1',
+                                    cwd = tmpDir )
+                self.assertEqual( proc.returncode, 0, proc.stderr )
+
+                CreateNetwork( None, interactionMatrixFile =
+                               matrix + '_CrossMap.npy', targetCols = [ 'Out' ],
+                               numDrivers = numDrivers, outputFile = singleFile )
+
+                self.NetworkFiles( streamFile, singleFile )
+
+    #------------------------------------------------------------
+    # InteractionMatrix --topK
+    #------------------------------------------------------------
+    def test_topk_network( self ):
+        '''CreateNetwork of --outMatrix .npy and _topk.npz are equal'''
+
+        with TemporaryDirectory() as tmpDir :
+            proc = self.RunApp( 'InteractionMatrix', '-d', self.dataFile,
+                                '-ccm', '-om', 'M', '-tk', '3', '-cr', '1',
+                                cwd = tmpDir )
+            self.assertEqual( proc.returncode, 0, proc.stderr )
+
+            for numDrivers in [ 1, 2, 3 ] :
+                self.assertEqual(
+                    self.NetworkMap( join( tmpDir, 'M_CCM.npy' ), numDrivers ),
+                    self.NetworkMap( join( tmpDir, 'M_CCM_top3.npz' ),
+                                     numDrivers ) )
+
+    #------------------------------------------------------------
+    # InteractionMatrix --screen
+    #------------------------------------------------------------
+    def test_screen_network( self ):
+        '''CrossMap screened by rho : fewer cells, same top driver network'''
+
+        from numpy import isnan, load
+        from InteractionMatrix import RankRows
+
+        with TemporaryDirectory() as tmpDir :
+            for screen in [ [], [ '-sc', 'rho', '-sk', '2' ] ] :
+                proc = self.RunApp( 'InteractionMatrix', '-d', self.dataFile,
+                                    '-b', '-cmap', '-om', f'M{len( screen )}',
+                                    '-cr', '1', *screen, cwd = tmpDir )
+                self.assertEqual( proc.returncode, 0, proc.stderr )
+
+            full     = load( join( tmpDir, 'M0_CrossMap.npy' ) )
+            screened = load( join( tmpDir, 'M4_CrossMap.npy' ) )
+            names    = [ 'A', 'B', 'C', 'D', 'Out' ]
+
+            # screenK = 2 of 4 targets per row : half the cells computed
+            self.assertEqual( isnan( full ).sum(), len( names ) )
+            self.assertEqual( isnan( screened ).sum(), 3 * len( names ) )
+            kept = ~isnan( screened )
+            self.assertTrue( ( screened[ kept ] == full[ kept ] ).all() )
+
+            # The screen keeps the first driver of the network nodes
+            network = self.NetworkMap( join( tmpDir, 'M0_CrossMap.npy' ), 1 )
+            ranked  = RankRows( full, names, 1 )
+            self.assertEqual( network, { 'Out' : [ 'C' ], 'C' : [] } )
+            for node in network :
+                row = names.index( node )
+                self.assertTrue( kept[ row, ranked[ row ] ].all() )
+
+            self.assertEqual( network,
+                self.NetworkMap( join( tmpDir, 'M4_CrossMap.npy' ), 1 ) )
+
+    #------------------------------------------------------------
+    # InteractionMatrix --shard --merge --resume
+    #------------------------------------------------------------
+    def test_shard_merge( self ):
+        '''Merged and resumed shard stores equal an unsharded run'''
+
+        import pickle
+
+        methods = [ '-cmap', '-rho' ]
+
+        def Run( *argv ):
+            proc = self.RunApp( 'InteractionMatrix', '-d', self.dataFile,
+                                '-cr', '1', *methods, *argv, cwd = tmpDir )
+            self.assertEqual( proc.returncode, 0, proc.stderr )
+            return proc
+
+        def Load( pklFile ):
+            with open( join( tmpDir, pklFile ), 'rb' ) as fob :
+                return pickle.load( fob )
+
+        with TemporaryDirectory() as tmpDir :
+            Run( '-op', 'full.pkl' )
+            Run( '-st', 'shard1.db', '-sh', '1/2' )
+            Run( '-st', 'shard2.db', '-sh', '2/2' )
+            Run( '-mg', 'shard1.db', 'shard2.db', '-op', 'merged.pkl' )
+            Run( '-st', 'shard1.db', '-r', '-op', 'resumed.pkl' )
+
+            full = Load( 'full.pkl' )
+            for pklFile in [ 'merged.pkl', 'resumed.pkl' ] :
+                result = Load( pklFile )
+                for key in [ 'CrossMap', 'Correlation' ] :
+                    self.assertTrue( result[ key ].equals( full[ key ] ),
+                                     f'{pklFile} {key}' )
+
+            # One shard does not merge to the full matrix
+            Run( '-mg', 'shard2.db', '-op', 'shard2.pkl' )
+            self.assertTrue( Load( 'shard2.pkl' )[ 'CrossMap' ].isna()
+                             .to_numpy().sum() >
+                             full[ 'CrossMap' ].isna().to_numpy().sum() )
+
+            # Columns added to the data : only their cells are computed
+            Run( '-st', 'added.db', '-i', '0', '1', '2', '3' )
+            proc = Run( '-st', 'added.db', '-r', '-op', 'added.pkl' )
+            self.assertIn( "adding 2 columns : ['D', 'Out']", proc.stdout )
+            for key in [ 'CrossMap', 'Correlation' ] :
+                self.assertTrue( Load( 'added.pkl' )[ key ].equals( full[ key ] ) )
+
+            # Stores of other parameters or data do not merge or resume
+            changed = read_csv( self.dataFile )
+            changed[ 'B' ] = changed[ 'B' ] * 2
+            changed.to_csv( join( tmpDir, 'changed.csv' ), index = False )
+
+            for argv in [ [ '-E', '3', '-mg', 'shard1.db', 'shard2.db' ],
+                          [ '-E', '3', '-st', 'shard2.db', '-r' ],
+                          [ '-sc', 'rho', '-st', 'shard2.db', '-r' ],
+                          [ '-d', 'changed.csv', '-st', 'shard2.db', '-r' ],
+                          [ '-d', 'changed.csv', '-mg', 'shard1.db' ] ] :
+                proc = self.RunApp( 'InteractionMatrix', '-d', self.dataFile,
+                                    '-cr', '1', *methods, *argv, cwd = tmpDir )
+                self.assertNotEqual( proc.returncode, 0, argv )
+                self.assertIn( 'do not match', proc.stderr, argv )
+
+    #------------------------------------------------------------
+    # NetworkNodesToCSV
+    #------------------------------------------------------------
+    def test_network_nodes_csv( self ):
+        '''Current .npz is read for its .pkl column, stale .npz and
+           non-networks are not'''
+
+        from os     import utime
+        from shutil import copy
+        from networkx import DiGraph
+
+        networkDir = abspath( '../network/ABCD_Test' )
+
+        with TemporaryDirectory() as tmpDir :
+            for name in [ 'current', 'stale' ] :
+                copy( join( networkDir, 'ABCD_Network_E3_T0_tau-1_CMI.pkl' ),
+                      join( tmpDir, name + '.pkl' ) )
+                gmn.WriteNetwork( join( tmpDir, name + '.npz' ),
+                                  DiGraph( [ ( name, 'Out' ) ] ) )
+            utime( join( tmpDir, 'stale.npz' ), ( 0, 0 ) )
+
+            with open( join( tmpDir, 'config.json' ), 'w' ) as f :
+                f.write( '{ "E" : 3 }' )
+
+            proc = self.RunApp( 'NetworkNodesToCSV', '-d', tmpDir + '/',
+                                '-o', join( tmpDir, 'nodes.csv' ),
+                                '-cr', '1', cwd = tmpDir )
+            self.assertEqual( proc.returncode, 0, proc.stderr )
+            self.assertIn( 'config.json is not a network', proc.stdout )
+
+            df = read_csv( join( tmpDir, 'nodes.csv' ) )
+            self.assertEqual( list( df.columns ),
+                              [ join( tmpDir, 'current.pkl' ),
+                                join( tmpDir, 'stale.pkl' ) ] )
+            self.assertEqual( df.iloc[:, 0].dropna().tolist(),
+                              [ 'current', 'Out' ] )
+            self.assertEqual( sorted( df.iloc[:, 1] ),
+                              sorted( gmn.ReadNetworkNodes(
+                                  join( tmpDir, 'stale.pkl' ) ) ) )
+
+    #------------------------------------------------------------
+    # Server.py & Submit.py
+    #------------------------------------------------------------
+    def test_server( self ):
+        '''Submit jobs to Server : invalid arguments, then a GMN job'''
+
+        from multiprocessing.connection import Client
+        from signal import SIGINT
+        from time   import sleep
+        from Submit import Submit
+
+        with TemporaryDirectory() as tmpDir :
+            socket  = join( tmpDir, 'gmn.sock' )
+            keyFile = join( tmpDir, 'authkey' )
+
+            server = subprocess.Popen( [ sys.executable,
+                                         join( self.appsDir, 'Server.py' ),
+                                         '-c', '1', '-s', socket,
+                                         '-kf', keyFile ], env = self.env,
+                                       stdout = subprocess.DEVNULL )
+            try:
+                for i in range( 120 ) : # wait for the Listener
+                    if exists( socket ) :
+                        break
+                    sleep( 0.5 )
+
+                # Key and socket are owner only
+                self.assertEqual( stat( keyFile ).st_mode & 0o777, 0o600 )
+                self.assertEqual( stat( socket ).st_mode & 0o777, 0o600 )
+
+                with self.assertRaises( AuthenticationError ) :
+                    Client( socket, family = 'AF_UNIX', authkey = b'gmn' )
+
+                results = Submit( [ 'gmn_test1.cfg' ], [ '--bogus' ],
+                                  socket = socket, authkeyFile = keyFile )
+                self.assertIn( '--bogus', results[0][ 'error' ] )
+
+                # Worker survives argparse SystemExit
+                results = Submit( [ 'gmn_test1.cfg' ],
+                                  socket = socket, authkeyFile = keyFile )
+                self.assertIsNone( results[0][ 'error' ] )
+
+                df = self.Files[ "DataOut_ABCD_CMI_E7_tau-3.csv" ]
+                self.assertTrue( df.equals( results[0]['DataOut'].round(4) ) )
+            finally :
+                server.send_signal( SIGINT )
+                server.wait( timeout = 60 )
+
 #------------------------------------------------------------
 #
 #------------------------------------------------------------